@@ -8,22 +8,36 @@ import pandas as pd
 from werkzeug.utils import secure_filename
 import hashlib
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from io import StringIO
-from flask import Response
+from flask import Response, send_file, stream_with_context
 from io import BytesIO
-import qrcode
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
-import zipfile
+import csv
 import tempfile
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pymongo import MongoClient, ASCENDING
 from pymongo.errors import DuplicateKeyError
 from bson.objectid import ObjectId
 from ems_app.blueprints.students import bp as students_v2_bp
 from ems_app.blueprints.allocation import bp as allocation_v2_bp
 from ems_app.extensions import init_mongo
+from ems_app.indexes import ensure_indexes
+from ems_app.migrations import PSEUDO_EMAIL_DOMAIN, backfill_mongo_reg_no, migrate, reg_no_from_email
+from ems_app.invigilation import build_hall_duties, assign_invigilators
+from ems_app.clashes import find_clashes
+from ems_app.timetable import build_conflict_graph, dsatur_schedule
+from ems_app.tickets import (render_tickets, render_tickets_merged, resolve_workers, draw_attendance_sheet,
+                             render_ticket_pdf, render_student_ticket_pdf, ticket_filename,
+                             render_attendance_sheets, render_attendance_merged)
+from ems_app.artifacts import ArtifactStore, artifact_key, artifact_slot, purge_on_commit
+from ems_app.aggregates import AggregateCache, invalidate_on_commit
+from ems_app.touched import TouchedModels
+from ems_app.sheet_cache import SHEET_COLUMNS, load_summary, query_rows, write_sheet
+from ems_app.versioning import (GLOBAL_SCOPE, scope_key, make_etag, request_variant, not_modified, with_etag,
+                                bump_on_commit, read_sql_versions)
+from ems_app.zipstream import stream_zip
 
 # ----------------------------------------
 # Helpers for Excel/CSV transformations
@@ -153,6 +167,7 @@ def mongo_student_to_dict(doc: dict) -> dict:
         'phone': doc.get('phone', ''),
         'department': doc.get('department', ''),
         'year': doc.get('year', ''),
+        'reg_no': doc.get('reg_no'),
         'created_at': (doc.get('created_at').isoformat() if doc.get('created_at') else None)
     }
 
@@ -178,7 +193,9 @@ DB_PORT = os.getenv('DB_PORT', '3306')
 
 # Create the database URI
 _encoded_password = quote_plus(DB_PASSWORD) if DB_PASSWORD else ''
-app.config['SQLALCHEMY_DATABASE_URI'] = f'mysql+mysqlconnector://{DB_USER}:{_encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+# DATABASE_URL (any SQLAlchemy URL, e.g. sqlite:///exam.db) overrides the MySQL settings
+app.config['SQLALCHEMY_DATABASE_URI'] = (os.getenv('DATABASE_URL') or
+                                         f'mysql+mysqlconnector://{DB_USER}:{_encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Optional MongoDB configuration (activate by setting USE_MONGO=true)
@@ -190,8 +207,9 @@ mongo_db = None
 if USE_MONGO:
     mongo_client = MongoClient(MONGO_URI)
     mongo_db = mongo_client[MONGO_DB_NAME]
-    # Ensure indexes
-    mongo_db.students.create_index([('email', ASCENDING)], unique=True)
+    # Ensure indexes (declared in ems_app/indexes.py), then give pre-reg_no students theirs
+    ensure_indexes(mongo_db)
+    backfill_mongo_reg_no(mongo_db)
 
 # Make Mongo config available to ems_app
 app.config['MONGO_URI'] = MONGO_URI
@@ -205,6 +223,23 @@ except Exception:
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Worker processes used to render hall-ticket PDFs (0 = one per CPU)
+app.config['HALLTICKET_WORKERS'] = resolve_workers(os.getenv('HALLTICKET_WORKERS', '0'))
+
+# Pre-rendered ticket PDFs, content-addressed on disk (see ems_app/artifacts.py)
+app.config['ARTIFACT_DIR'] = os.getenv('ARTIFACT_DIR', os.path.join('uploads', 'artifacts'))
+app.config['ARTIFACT_PRERENDER'] = os.getenv('ARTIFACT_PRERENDER', 'true').strip().lower() == 'true'
+
+# Seconds a cached dashboard may lag writes made by another worker process
+app.config['DASHBOARD_CACHE_TTL'] = float(os.getenv('DASHBOARD_CACHE_TTL', '30'))
+
+# College header printed on HTML hall tickets
+app.config['COLLEGE_INFO'] = {
+    'name': os.getenv('COLLEGE_NAME', 'KPR College of Arts Science and Research'),
+    'subtitle': os.getenv('COLLEGE_EXAM_TITLE', 'CIA - I EXAMINATIONS - AUGUST 2025'),
+    'address': os.getenv('COLLEGE_ADDRESS', 'Avinashi Road, Arasur, Coimbatore-641 407.'),
+}
+
 # Create upload folder if it doesn't exist
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
@@ -245,11 +280,21 @@ class Student(db.Model):
     phone = db.Column(db.String(15), nullable=False)
     department = db.Column(db.String(50), nullable=False)
     year = db.Column(db.String(10), nullable=False)
+    # Register number from timetable imports; NULL for students added by hand
+    reg_no = db.Column(db.String(30), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Add this relationship:
     attendances = db.relationship('Attendance', back_populates='student', lazy=True)
 
+    # Filtered, keyset-paginated listing in /api/students; reg_no lookups in /api/students/lookup
+    __table_args__ = (
+        db.Index('ix_student_department_year_id', 'department', 'year', 'id'),
+        db.Index('ix_student_year_id', 'year', 'id'),
+        db.Index('ix_student_department_id', 'department', 'id'),
+        db.Index('ux_student_reg_no', 'reg_no', unique=True),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -258,9 +303,25 @@ class Student(db.Model):
             'phone': self.phone,
             'department': self.department,
             'year': self.year,
+            'reg_no': self.reg_no,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+def pseudo_email(reg_no):
+    # Timetable imports carry no email, but Student.email is required and unique
+    return f"{reg_no}@{PSEUDO_EMAIL_DOMAIN}"
+
+
+def _student_for_reg(reg_no):
+    # One lookup on ux_student_reg_no: migration 2 backfilled reg_no from the pseudo-emails
+    student = Student.query.filter_by(reg_no=reg_no).first()
+    if student is None:
+        # A row that never had reg_no set (e.g. created before it was) but holds the pseudo-email
+        student = Student.query.filter_by(email=pseudo_email(reg_no), reg_no=None).first()
+        if student is not None:
+            student.reg_no = reg_no
+    return student
+
 class Staff(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -327,6 +388,12 @@ class Exam(db.Model):
     # Cascade delete for attendance records
     attendances = db.relationship('Attendance', back_populates='exam', lazy=True, cascade='all, delete-orphan')
 
+    # Added to existing databases by ems_app.migrations (version 1)
+    __table_args__ = (
+        db.Index('ix_exam_date_time', 'date', 'time'),
+        db.Index('ix_exam_status_id', 'status', 'id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -356,6 +423,11 @@ class Attendance(db.Model):
     student = db.relationship('Student', back_populates='attendances')
     exam = db.relationship('Exam', back_populates='attendances')
 
+    __table_args__ = (
+        db.Index('ix_attendance_exam', 'exam_id'),
+        db.Index('ix_attendance_student_exam', 'student_id', 'exam_id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -383,7 +455,10 @@ class StudentSubject(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
-    __table_args__ = (db.UniqueConstraint('student_id', 'subject_id', name='uq_student_subject'),)
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'subject_id', name='uq_student_subject'),
+        db.Index('ix_student_subject_subject', 'subject_id'),
+    )
 
 class ExamSlot(db.Model):
     __tablename__ = 'exam_slot'
@@ -393,7 +468,10 @@ class ExamSlot(db.Model):
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
     department = db.Column(db.String(50), nullable=True)
     year = db.Column(db.String(10), nullable=True)
-    __table_args__ = (db.UniqueConstraint('date', 'session', 'subject_id', name='uq_exam_slot'),)
+    __table_args__ = (
+        db.UniqueConstraint('date', 'session', 'subject_id', name='uq_exam_slot'),
+        db.Index('ix_exam_slot_date_session', 'date', 'session'),
+    )
 
 class HallSeat(db.Model):
     __tablename__ = 'hall_seat'
@@ -403,7 +481,11 @@ class HallSeat(db.Model):
     seat_no = db.Column(db.Integer, nullable=False)  # 1..60
     desk_no = db.Column(db.Integer, nullable=False)  # 1..30
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
-    __table_args__ = (db.UniqueConstraint('exam_slot_id', 'hall_id', 'seat_no', name='uq_slot_hall_seat'),)
+    __table_args__ = (
+        db.UniqueConstraint('exam_slot_id', 'hall_id', 'seat_no', name='uq_slot_hall_seat'),
+        db.Index('ix_hall_seat_student_slot', 'student_id', 'exam_slot_id'),
+        db.Index('ix_hall_seat_hall', 'hall_id'),
+    )
 
 class Faculty(db.Model):
     __tablename__ = 'faculty'
@@ -432,9 +514,108 @@ class BookletIssue(db.Model):
     returned = db.Column(db.Integer, default=0)
     __table_args__ = (db.UniqueConstraint('exam_slot_id', 'hall_id', name='uq_booklet'),)
 
-# Create tables
+class DataVersion(db.Model):
+    # Change counter per 'YYYY-MM-DD/SESS' scope ('*' = global), used for export ETags
+    __tablename__ = 'data_version'
+    scope = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+_SESSION_BY_TIME = {'09:30': 'FN', '13:30': 'AN', '16:00': 'EV'}
+
+
+def _exam_scope(ex_date, ex_time):
+    t = ex_time.strftime('%H:%M') if ex_time else ''
+    return scope_key(ex_date, _SESSION_BY_TIME.get(t, t))
+
+
+def _attr_values(obj, attr):
+    # Current value plus the pre-flush value when it was changed
+    from sqlalchemy import inspect as _inspect
+    hist = _inspect(obj).attrs[attr].history
+    return [v for v in list(hist.added or ()) + list(hist.unchanged or ()) + list(hist.deleted or ()) if v is not None]
+
+
+def _version_markers(sess, obj):
+    """Scopes whose exports change with ``obj``: seats, attendance, slots and exams map
+    to their (date, session); edits to students, halls and subjects are global.
+    Seats and attendance only carry ids here; _version_scopes resolves them at commit."""
+    if isinstance(obj, HallSeat):
+        return {('slot', i) for i in _attr_values(obj, 'exam_slot_id')}
+    if isinstance(obj, Attendance):
+        return {('exam', i) for i in _attr_values(obj, 'exam_id')}
+    if isinstance(obj, ExamSlot):
+        return {scope_key(d, s) for d in _attr_values(obj, 'date') for s in _attr_values(obj, 'session')}
+    if isinstance(obj, Exam):
+        return {_exam_scope(d, t) for d in _attr_values(obj, 'date') for t in _attr_values(obj, 'time')}
+    # Student, Hall, Subject: a new row is not on any export yet
+    return set() if obj in sess.new else {GLOBAL_SCOPE}
+
+
+def _version_scopes(connection, markers):
+    scopes = {m for m in markers if isinstance(m, str)}
+    slot_ids = {m[1] for m in markers if isinstance(m, tuple) and m[0] == 'slot'}
+    exam_ids = {m[1] for m in markers if isinstance(m, tuple) and m[0] == 'exam'}
+    if slot_ids:
+        t = ExamSlot.__table__
+        scopes.update(scope_key(d, s) for d, s in
+                      connection.execute(db.select(t.c.date, t.c.session).where(t.c.id.in_(slot_ids))))
+    if exam_ids:
+        t = Exam.__table__
+        scopes.update(_exam_scope(d, tm) for d, tm in
+                      connection.execute(db.select(t.c.date, t.c.time).where(t.c.id.in_(exam_ids))))
+    return scopes
+
+
+# One walk of each flush's touched rows feeds the version counters, the artifact store and the dashboard cache
+touched_models = TouchedModels(db.session)
+bump_on_commit(touched_models, DataVersion.__table__, (HallSeat, Attendance, ExamSlot, Exam, Student, Hall, Subject),
+               _version_markers, _version_scopes)
+
+
+def _export_etag(ex_date, sess):
+    """Strong ETag for an export of (date, session): one read of two counters."""
+    versions = read_sql_versions(db.session.connection(), DataVersion.__table__,
+                                 [scope_key(ex_date, sess), GLOBAL_SCOPE])
+    return make_etag(versions, request_variant())
+
+
+# Stored ticket PDFs of a student are dropped once their seats change; attendance
+# is not printed on a ticket, so marking it leaves the pre-rendered store alone
+artifact_store = ArtifactStore(app.config['ARTIFACT_DIR'])
+purge_on_commit(touched_models, artifact_store, (HallSeat,))
+# Single background thread so concurrent allocations pre-render one after another
+_prerender_executor = ThreadPoolExecutor(max_workers=1)
+
+
+def _load_dashboard():
+    # All counts in one round trip; students come from Mongo when it holds them
+    counts = db.session.execute(db.select(
+        db.select(db.func.count()).select_from(Student).scalar_subquery(),
+        db.select(db.func.count()).select_from(Staff).scalar_subquery(),
+        db.select(db.func.count()).select_from(Hall).scalar_subquery(),
+        db.select(db.func.count()).select_from(Exam).scalar_subquery(),
+    )).one()
+    total_students = mongo_db.students.count_documents({}) if USE_MONGO else counts[0]
+    recent_exams = (Exam.query.options(joinedload(Exam.hall), joinedload(Exam.staff))
+                    .order_by(Exam.date.desc()).limit(5).all())
+    return {
+        'total_students': total_students,
+        'total_staff': counts[1],
+        'total_halls': counts[2],
+        'total_exams': counts[3],
+        'recent_exams': [exam.to_dict() for exam in recent_exams]
+    }
+
+
+# Dashboard aggregates: refreshed after any committed student/staff/hall/exam write
+dashboard_cache = AggregateCache(_load_dashboard, ttl=app.config['DASHBOARD_CACHE_TTL'])
+invalidate_on_commit(touched_models, dashboard_cache, (Student, Staff, Hall, Exam))
+
+# Create tables, then bring existing ones up to date (indexes create_all never adds)
 with app.app_context():
     db.create_all()
+    migrate(db.engine)
     
     # Create default admin user if it doesn't exist (SQL store)
     admin = Admin.query.filter_by(username='admin').first()
@@ -480,49 +661,41 @@ def students():
     # Check if admin is logged in
     if 'admin_id' not in session:
         return redirect(url_for('login'))
-    # Try to load the most recently uploaded 16-column sheet view
-    desired_cols = [
-        'SNO','ENQ','Reg_No','Name of the Student','Prog & Year','CLASS CODE','year','Degree','Dept',
-        'DEPT ORD','CLASS ORD','SUB ORD','SUB_CODE','SUB_TITLE','DATE','SESS'
-    ]
-    rows = []
-    columns = desired_cols.copy()
-    json_path = session.get('last_students_json')
+    # Only the precomputed summary is read here; rows are paged in via /api/students/sheet
     try:
-        if json_path and os.path.exists(json_path):
-            with open(json_path, 'r', encoding='utf-8') as f:
-                rows = json.load(f)
-            if rows:
-                # Keep only the columns present in data, preserving desired order
-                present = [c for c in desired_cols if c in rows[0]]
-                if present:
-                    columns = present
+        summary = load_summary(session.get('last_students_json'))
     except Exception:
-        rows = []
-        columns = desired_cols.copy()
-
-    # Build subject grouping summary: by (SUB_CODE, SUB_TITLE, DATE, SESS)
-    subjects_map = {}
-    for r in rows or []:
-        key = (
-            r.get('SUB_CODE', ''),
-            r.get('SUB_TITLE', ''),
-            r.get('DATE', ''),
-            r.get('SESS', ''),
-        )
-        subjects_map[key] = subjects_map.get(key, 0) + 1
-    subjects = [
-        {
-            'SUB_CODE': k[0],
-            'SUB_TITLE': k[1],
-            'DATE': k[2],
-            'SESS': k[3],
-            'TOTAL': v,
-        }
-        for k, v in sorted(subjects_map.items(), key=lambda x: (x[0][2], x[0][3], x[0][0], x[0][1]))
-    ]
+        summary = None
+    if not summary or not summary.get('total'):
+        return render_template('students.html', columns=SHEET_COLUMNS, has_sheet=False, subjects=[])
+    return render_template('students.html', columns=summary['columns'], has_sheet=True,
+                           subjects=summary['subjects'], total_rows=summary['total'])
+
+
+SHEET_PAGE_MAX = 500
+
+
+# Page of the uploaded 16-column sheet: ?offset&limit&q&sort&order=asc|desc
+@app.route('/api/students/sheet')
+def students_sheet():
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    json_path = session.get('last_students_json')
+    if not json_path or not os.path.exists(json_path):
+        return jsonify({'total': 0, 'filtered': 0, 'offset': 0, 'limit': 0, 'rows': []})
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = int(request.args.get('limit', 25))
+        # DataTables sends length=-1 for "All": serve the largest page instead
+        limit = SHEET_PAGE_MAX if limit < 0 else min(max(1, limit), SHEET_PAGE_MAX)
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    return jsonify(query_rows(json_path,
+                              q=request.args.get('q', ''),
+                              sort=request.args.get('sort') or None,
+                              descending=request.args.get('order', 'asc').lower() == 'desc',
+                              offset=offset, limit=limit))
 
-    return render_template('students.html', columns=columns, rows=rows, subjects=subjects)
 
 @app.route('/staff')
 def staff():
@@ -574,18 +747,123 @@ def uploaded_students():
     # Fetch all students from database
     students = Student.query.all()
     return render_template('uploaded_students.html', students=students)
+STUDENT_FIELDS = ('id', 'name', 'email', 'phone', 'department', 'year', 'reg_no', 'created_at')
+STUDENT_PAGE_MAX = 1000
+
+
 @app.route('/api/students', methods=['GET'])
 def get_students():
+    # Optional: fields=name,email  department=..  year=..
+    # Paging (keyset on id): limit=N [after_id=last id of previous page]
+    # Without limit/after_id the full list is returned as a plain array, as before.
+    fields = [f.strip() for f in (request.args.get('fields') or '').split(',') if f.strip()] or list(STUDENT_FIELDS)
+    unknown = [f for f in fields if f not in STUDENT_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    department = request.args.get('department')
+    year = request.args.get('year')
+    paginate = 'limit' in request.args or 'after_id' in request.args
+    try:
+        after_id = int(request.args.get('after_id', 0))
+        limit = min(int(request.args.get('limit', 100)), STUDENT_PAGE_MAX)
+        if limit <= 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'limit and after_id must be positive integers'}), 400
+
     try:
         if USE_MONGO:
-            docs = list(mongo_db.students.find({}, {'_id': 0}))
-            return jsonify([mongo_student_to_dict(d) for d in docs])
+            query = {}
+            if department:
+                query['department'] = department
+            if year:
+                query['year'] = year
+            if after_id:
+                query['id'] = {'$gt': after_id}
+            cursor = mongo_db.students.find(query, {'_id': 0, **{f: 1 for f in fields}}).sort('id', ASCENDING)
+            if paginate:
+                cursor = cursor.limit(limit + 1)
+            rows = [{k: v for k, v in mongo_student_to_dict(d).items() if k in fields} for d in cursor]
         else:
-            students = Student.query.all()
-            return jsonify([student.to_dict() for student in students])
+            q = db.session.query(*[getattr(Student, f) for f in fields])
+            if department:
+                q = q.filter(Student.department == department)
+            if year:
+                q = q.filter(Student.year == year)
+            if after_id:
+                q = q.filter(Student.id > after_id)
+            q = q.order_by(Student.id.asc())
+            if paginate:
+                q = q.limit(limit + 1)
+            rows = []
+            for values in q:
+                row = dict(zip(fields, values))
+                if 'created_at' in row:
+                    row['created_at'] = row['created_at'].isoformat() if row['created_at'] else None
+                rows.append(row)
+
+        if not paginate:
+            return jsonify(rows)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return jsonify({
+            'students': rows,
+            'limit': limit,
+            'next_after_id': rows[-1]['id'] if has_more else None,
+        })
     except Exception as e:
         return jsonify({'error': 'Failed to fetch students'}), 500
 
+
+STUDENT_LOOKUP_MAX = 50
+
+
+def _prefix_upper_bound(prefix):
+    # Smallest string above every string that starts with prefix: turns a prefix into an index range
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+# Find students by register number: reg_no=<exact> or prefix=<start> [limit=N]
+@app.route('/api/students/lookup', methods=['GET'])
+def lookup_students():
+    reg_no = (request.args.get('reg_no') or '').strip()
+    prefix = (request.args.get('prefix') or '').strip()
+    if not reg_no and not prefix:
+        return jsonify({'error': 'reg_no or prefix is required'}), 400
+    try:
+        limit = min(int(request.args.get('limit', 20)), STUDENT_LOOKUP_MAX)
+        if limit <= 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    try:
+        if USE_MONGO:
+            if reg_no:
+                query = {'reg_no': reg_no}
+            else:
+                query = {'reg_no': {'$gte': prefix, '$lt': _prefix_upper_bound(prefix)}}
+            cursor = mongo_db.students.find(query, {'_id': 0}).sort('reg_no', ASCENDING).limit(limit)
+            students = [mongo_student_to_dict(d) for d in cursor]
+        else:
+            # Equality or a >= / < range on ux_student_reg_no; LIKE 'x%' is not a range scan on every backend
+            q = Student.query
+            if reg_no:
+                q = q.filter(Student.reg_no == reg_no)
+            else:
+                q = q.filter(Student.reg_no >= prefix, Student.reg_no < _prefix_upper_bound(prefix))
+            students = [st.to_dict() for st in q.order_by(Student.reg_no.asc()).limit(limit)]
+    except Exception as e:
+        return jsonify({'error': 'Failed to look up students'}), 500
+
+    if reg_no:
+        if not students:
+            return jsonify({'error': 'Student not found'}), 404
+        return jsonify(students[0])
+    return jsonify({'students': students, 'limit': limit})
+
 @app.route('/api/students', methods=['POST'])
 def create_student():
     try:
@@ -618,9 +896,11 @@ def create_student():
                     'phone': data['phone'],
                     'department': data['department'],
                     'year': data['year'],
+                    'reg_no': reg_no_from_email(data['email']),
                     'created_at': datetime.utcnow()
                 }
                 mongo_db.students.insert_one(doc)
+                dashboard_cache.invalidate()
                 return jsonify(mongo_student_to_dict(doc)), 201
             except DuplicateKeyError:
                 return jsonify({'error': 'Student with this email already exists'}), 400
@@ -628,12 +908,16 @@ def create_student():
             existing_student = Student.query.filter_by(email=data['email']).first()
             if existing_student:
                 return jsonify({'error': 'Student with this email already exists'}), 400
+            reg_no = reg_no_from_email(data['email'])
+            if reg_no and Student.query.filter_by(reg_no=reg_no).first():
+                return jsonify({'error': 'Student with this register number already exists'}), 400
             student = Student(
                 name=data['name'],
                 email=data['email'],
                 phone=data['phone'],
                 department=data['department'],
-                year=data['year']
+                year=data['year'],
+                reg_no=reg_no
             )
             db.session.add(student)
             db.session.commit()
@@ -719,6 +1003,7 @@ def delete_student(id):
             res = mongo_db.students.delete_one({'id': id})
             if res.deleted_count == 0:
                 return jsonify({'error': 'Student not found'}), 404
+            dashboard_cache.invalidate()
             return '', 204
         else:
             student = Student.query.get_or_404(id)
@@ -728,6 +1013,7 @@ def delete_student(id):
             StudentSubject.query.filter_by(student_id=id).delete()
             db.session.delete(student)
             db.session.commit()
+            artifact_store.purge([id])
             return '', 204
     except Exception as e:
         db.session.rollback()
@@ -945,7 +1231,8 @@ def delete_hall(id):
 @app.route('/api/exams', methods=['GET'])
 def get_exams():
     try:
-        exams = Exam.query.all()
+        # Hall and staff names come from the same query (to_dict reads both)
+        exams = Exam.query.options(joinedload(Exam.hall), joinedload(Exam.staff)).all()
         return jsonify([exam.to_dict() for exam in exams])
     except Exception as e:
         return jsonify({'error': 'Failed to fetch exams'}), 500
@@ -1121,11 +1408,33 @@ def delete_exam(id):
 
 
 # Attendance API Routes
+def _attendance_dicts(*criteria):
+    """Attendance.to_dict() for every matching row from one column-only outer join."""
+    q = (db.session.query(Attendance.id, Attendance.student_id, Attendance.exam_id, Attendance.status,
+                          Attendance.remarks, Attendance.created_at, Student.name, Exam.subject)
+         .outerjoin(Student, Student.id == Attendance.student_id)
+         .outerjoin(Exam, Exam.id == Attendance.exam_id)
+         .filter(*criteria)
+         .order_by(Attendance.id.asc()))
+    return [
+        {
+            'id': att_id,
+            'student_id': student_id,
+            'exam_id': exam_id,
+            'status': status,
+            'remarks': remarks,
+            'created_at': created_at.isoformat() if created_at else None,
+            'student_name': student_name,
+            'exam_subject': exam_subject
+        }
+        for att_id, student_id, exam_id, status, remarks, created_at, student_name, exam_subject in q
+    ]
+
+
 @app.route('/api/attendances', methods=['GET'])
 def get_attendances():
     try:
-        attendances = Attendance.query.all()
-        return jsonify([attendance.to_dict() for attendance in attendances])
+        return jsonify(_attendance_dicts())
     except Exception as e:
         return jsonify({'error': 'Failed to fetch attendances'}), 500
 
@@ -1270,10 +1579,7 @@ def upload_students():
                 elif filename.endswith(('.xlsx', '.xls')):
                     raw = pd.read_excel(file_path, dtype=str)
                 if raw is not None and len(raw.columns) > 0:
-                    desired_cols = [
-                        'SNO','ENQ','Reg_No','Name of the Student','Prog & Year','CLASS CODE','year','Degree','Dept',
-                        'DEPT ORD','CLASS ORD','SUB ORD','SUB_CODE','SUB_TITLE','DATE','SESS'
-                    ]
+                    desired_cols = SHEET_COLUMNS
                     cols_lower = {str(c).strip().lower(): c for c in raw.columns}
                     def get_src(name: str):
                         keys = [name,
@@ -1293,9 +1599,7 @@ def upload_students():
                         else:
                             data[dc] = ""
                     display_df2 = pd.DataFrame(data, columns=desired_cols).fillna("")
-                    json_path2 = os.path.join(app.config['UPLOAD_FOLDER'], 'last_students.json')
-                    display_df2.to_json(json_path2, orient='records', force_ascii=False)
-                    session['last_students_json'] = json_path2
+                    session['last_students_json'] = write_sheet(display_df2, app.config['UPLOAD_FOLDER'])
             except Exception:
                 pass
 
@@ -1314,10 +1618,12 @@ def upload_students():
                     dept_val = str(row['Department']).strip()
                     year_val = str(row['Year']).strip()
 
-                    # If email missing but ID present, derive pseudo email; else if both missing, skip
+                    # If email missing but ID present, it is the register number: derive pseudo email
+                    reg_val = None
                     if not email_val:
                         if id_val:
-                            email_val = f"{id_val}@example.edu"
+                            reg_val = id_val
+                            email_val = pseudo_email(id_val)
                         else:
                             raise ValueError('Missing Email and ID')
 
@@ -1337,6 +1643,8 @@ def upload_students():
                             'department': dept_val,
                             'year': year_val
                         }
+                        if reg_val:
+                            doc['reg_no'] = reg_val
                         existing = mongo_db.students.find_one({'email': email_val})
                         if existing:
                             mongo_db.students.update_one({'email': email_val}, {'$set': doc})
@@ -1345,7 +1653,10 @@ def upload_students():
                             doc['created_at'] = datetime.utcnow()
                             mongo_db.students.insert_one(doc)
                     else:
-                        existing_student = Student.query.filter_by(email=email_val).first()
+                        if reg_val:
+                            existing_student = _student_for_reg(reg_val)
+                        else:
+                            existing_student = Student.query.filter_by(email=email_val).first()
                         if existing_student:
                             existing_student.name = name_val
                             existing_student.phone = phone_val
@@ -1357,7 +1668,8 @@ def upload_students():
                                 email=email_val,
                                 phone=phone_val,
                                 department=dept_val,
-                                year=year_val
+                                year=year_val,
+                                reg_no=reg_val
                             )
                             db.session.add(student)
 
@@ -1367,6 +1679,8 @@ def upload_students():
 
             if not USE_MONGO:
                 db.session.commit()
+            else:
+                dashboard_cache.invalidate()
 
             # Clean up uploaded file
             os.remove(file_path)
@@ -1496,31 +1810,49 @@ def import_excel():
         created_links = 0
         created_seats = 0
 
+        # Parse dates and detect clashes before writing, so clashing rows are never seated
+        exam_dates = []
+        registrations = []
+        for _, row in df.iterrows():
+            date_val = row['exam_date']
+            try:
+                if isinstance(date_val, str):
+                    ex_date = _dt.strptime(date_val.strip(), '%Y-%m-%d').date() if '-' in date_val else _dt.strptime(date_val.strip(), '%d-%m-%Y').date()
+                else:
+                    ex_date = pd.to_datetime(date_val).date()
+            except Exception:
+                return jsonify({'error': f'Invalid exam_date: {date_val}'}), 400
+            exam_dates.append(ex_date)
+            registrations.append((str(row['reg_no']).strip(), ex_date, str(row['session']).strip().upper(),
+                                  str(row['subject_code']).strip()))
+        clashes = find_clashes(registrations)
+        clash_keys = {(c['reg_no'], c['date'], c['session']) for c in clashes}
+        skipped_seats = 0
+
         # Cache lookups
         subj_cache = {}
         student_cache = {}
 
-        for _, row in df.iterrows():
+        for i, (_, row) in enumerate(df.iterrows()):
             reg = str(row['reg_no']).strip()
             sname = str(row['name']).strip()
             dept = str(row['department']).strip()
             year = str(row['year']).strip()
             scode = str(row['subject_code']).strip()
             stitle = str(row['subject_title']).strip()
-            date_val = row['exam_date']
             sess = str(row['session']).strip().upper()
             hall_no = str(row['hall_no']).strip() if 'hall_no' in df.columns and pd.notna(row['hall_no']) else None
             seat_no = int(row['seat_no']) if 'seat_no' in df.columns and pd.notna(row['seat_no']) else None
 
             # Student
-            email = f"{reg}@example.edu"
-            student = student_cache.get(email) or Student.query.filter_by(email=email).first()
+            student = student_cache.get(reg) or _student_for_reg(reg)
             if not student:
-                student = Student(name=sname, email=email, phone='0000000000', department=dept, year=year)
+                student = Student(name=sname, email=pseudo_email(reg), reg_no=reg, phone='0000000000',
+                                  department=dept, year=year)
                 db.session.add(student)
                 db.session.flush()
                 created_students += 1
-                student_cache[email] = student
+            student_cache[reg] = student
 
             # Subject
             subj_key = (scode, stitle)
@@ -1540,14 +1872,7 @@ def import_excel():
                 created_links += 1
 
             # ExamSlot
-            try:
-                if isinstance(date_val, str):
-                    ex_date = _dt.strptime(date_val.strip(), '%Y-%m-%d').date() if '-' in date_val else _dt.strptime(date_val.strip(), '%d-%m-%Y').date()
-                else:
-                    ex_date = pd.to_datetime(date_val).date()
-            except Exception:
-                return jsonify({'error': f'Invalid exam_date: {date_val}'}), 400
-
+            ex_date = exam_dates[i]
             slot = ExamSlot.query.filter_by(date=ex_date, session=sess, subject_id=subject.id).first()
             if not slot:
                 slot = ExamSlot(date=ex_date, session=sess, subject_id=subject.id, department=dept, year=year)
@@ -1555,8 +1880,10 @@ def import_excel():
                 db.session.flush()
                 created_slots += 1
 
-            # Optional pre-assigned seating
-            if hall_no and seat_no:
+            # Optional pre-assigned seating; a student with two subjects in this session is left unseated
+            if hall_no and seat_no and (reg, ex_date.isoformat(), sess) in clash_keys:
+                skipped_seats += 1
+            elif hall_no and seat_no:
                 hall = Hall.query.filter((Hall.name == hall_no) | (Hall.room_number == hall_no)).first()
                 if hall:
                     desk_no = ((seat_no - 1) // 2) + 1
@@ -1574,7 +1901,10 @@ def import_excel():
             'created_subjects': created_subjects,
             'created_exam_slots': created_slots,
             'created_student_subject_links': created_links,
-            'created_preassigned_seats': created_seats
+            'created_preassigned_seats': created_seats,
+            'skipped_clashing_seats': skipped_seats,
+            'clash_count': len(clashes),
+            'clashes': clashes
         })
     except Exception as e:
         db.session.rollback()
@@ -1657,12 +1987,235 @@ def allocate_halls():
             result.append({'exam_slot_id': slot.id, 'subject_id': slot.subject_id, 'allocations': allocations})
 
         db.session.commit()
+        if app.config['ARTIFACT_PRERENDER']:
+            _prerender_executor.submit(_prerender_tickets, ex_date, sess)
         return jsonify({'message': 'Allocation completed', 'slots': result})
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Allocation failed: {str(e)}'}), 500
 
 
+@app.route('/api/clashes', methods=['GET'])
+def get_clashes():
+    # Params: optional date=YYYY-MM-DD, session=FN|AN|EV
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    date_str = request.args.get('date')
+    sess = (request.args.get('session') or '').upper()
+    try:
+        from datetime import datetime as _dt
+        ex_date = _dt.strptime(date_str, '%Y-%m-%d').date() if date_str else None
+    except Exception:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    try:
+        # Exam-slot seats (import_excel, allocate): the slot a student actually sits, not every
+        # slot of their subjects, which may be scheduled for other departments on other dates
+        q = (db.session.query(Student.reg_no, Student.email, ExamSlot.date, ExamSlot.session, Subject.code)
+             .join(HallSeat, HallSeat.student_id == Student.id)
+             .join(ExamSlot, ExamSlot.id == HallSeat.exam_slot_id)
+             .join(Subject, Subject.id == ExamSlot.subject_id))
+        if ex_date:
+            q = q.filter(ExamSlot.date == ex_date)
+        if sess:
+            q = q.filter(ExamSlot.session == sess)
+
+        # Registrations allocated as Exam/Attendance rows (upload_timetable)
+        q2 = (db.session.query(Student.reg_no, Student.email, Exam.date, Exam.time, Exam.subject)
+              .join(Attendance, Attendance.student_id == Student.id)
+              .join(Exam, Exam.id == Attendance.exam_id))
+        if ex_date:
+            q2 = q2.filter(Exam.date == ex_date)
+        if sess:
+            session_to_time = {v: k for k, v in _SESSION_BY_TIME.items()}
+            if sess not in session_to_time:
+                return jsonify({'error': 'Invalid session. Use FN, AN, or EV'}), 400
+            q2 = q2.filter(Exam.time == _dt.strptime(session_to_time[sess], '%H:%M').time())
+
+        # Students without a register number (added by hand) are identified by email
+        def rows():
+            for reg_no, email, d, s, code in q.yield_per(5000):
+                yield (reg_no or email, d, s, code)
+            for reg_no, email, d, t, subject in q2.yield_per(5000):
+                t_key = t.strftime('%H:%M') if t else ''
+                yield (reg_no or email, d, _SESSION_BY_TIME.get(t_key, t_key), (subject or '').split(' - ')[0])
+
+        clashes = find_clashes(rows())
+        return jsonify({'clash_count': len(clashes), 'clashes': clashes})
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch clashes: {str(e)}'}), 500
+
+
+@app.route('/api/timetable/generate', methods=['POST'])
+def generate_timetable():
+    # Body: { start_date: YYYY-MM-DD, days: int, sessions?: ["FN","AN"],
+    #         slot_capacity?: int, skip_sundays?: bool }
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    data = request.get_json(silent=True) or {}
+    try:
+        from datetime import datetime as _dt, timedelta
+        if not data.get('start_date') or not data.get('days'):
+            return jsonify({'error': 'start_date and days are required'}), 400
+        start = _dt.strptime(data['start_date'], '%Y-%m-%d').date()
+        days = int(data['days'])
+        sessions = [str(x).strip().upper() for x in (data.get('sessions') or ['FN', 'AN'])]
+        skip_sundays = data.get('skip_sundays', True)
+        if days <= 0 or not sessions:
+            return jsonify({'error': 'days must be positive and sessions non-empty'}), 400
+
+        # Candidate slots in chronological order
+        slots = []
+        d = start
+        while len(slots) < days * len(sessions):
+            if not (skip_sundays and d.weekday() == 6):
+                slots.extend((d, sess) for sess in sessions)
+            d += timedelta(days=1)
+        slot_index = {key: i for i, key in enumerate(slots)}
+
+        # Per-slot capacity defaults to the seats all halls offer (60 per hall max, as in allocation)
+        if data.get('slot_capacity'):
+            slot_capacity = int(data['slot_capacity'])
+        else:
+            slot_capacity = sum(min(h.capacity or 60, 60) for h in Hall.query.all()) or None
+
+        enrolment, adjacency = build_conflict_graph(
+            db.session.query(StudentSubject.student_id, StudentSubject.subject_id).yield_per(20000)
+        )
+        if not enrolment:
+            return jsonify({'error': 'No student registrations found'}), 404
+
+        # Subjects that already have a slot keep it; those inside the window constrain the rest
+        precoloured = {}
+        already = set()
+        for subject_id, ex_date, sess in db.session.query(ExamSlot.subject_id, ExamSlot.date, ExamSlot.session):
+            already.add(subject_id)
+            idx = slot_index.get((ex_date, (sess or '').upper()))
+            if idx is not None:
+                precoloured[subject_id] = idx
+        for subject_id in already - set(precoloured):
+            enrolment.pop(subject_id, None)
+
+        plan = dsatur_schedule(enrolment, adjacency, len(slots), slot_capacity, precoloured)
+
+        subjects = {s.id: s for s in Subject.query.filter(Subject.id.in_(list(enrolment))).all()} if enrolment else {}
+        mappings = []
+        for subject_id, idx in plan['assignment'].items():
+            if subject_id in already:
+                continue
+            subj = subjects.get(subject_id)
+            ex_date, sess = slots[idx]
+            mappings.append({
+                'date': ex_date,
+                'session': sess,
+                'subject_id': subject_id,
+                'department': subj.department if subj else None,
+                'year': subj.year if subj else None,
+            })
+        for i in range(0, len(mappings), 2000):
+            db.session.bulk_insert_mappings(ExamSlot, mappings[i:i + 2000])
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Timetable generated',
+            'created_exam_slots': len(mappings),
+            'slot_capacity': slot_capacity,
+            'slots': [
+                {'date': ex_date.isoformat(), 'session': sess, 'students': plan['slot_load'][i]}
+                for i, (ex_date, sess) in enumerate(slots) if plan['slot_load'][i]
+            ],
+            'unscheduled': [
+                {'subject_id': sid, 'code': subjects[sid].code if sid in subjects else None, 'students': enrolment.get(sid, 0)}
+                for sid in plan['unscheduled']
+            ]
+        })
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': f'Invalid request: {str(e)}'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Timetable generation failed: {str(e)}'}), 500
+
+
+@app.route('/api/invigilation/assign', methods=['POST'])
+def assign_invigilation():
+    # Body: { date_from?: YYYY-MM-DD, date_to?: YYYY-MM-DD, max_duties?: int,
+    #         two_above?: int, time_budget?: seconds }
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    data = request.get_json(silent=True) or {}
+    try:
+        from datetime import datetime as _dt
+        max_duties = int(data.get('max_duties', 6))
+        two_above = int(data.get('two_above', 30))
+        time_budget = float(data.get('time_budget', 10))
+        if max_duties <= 0:
+            return jsonify({'error': 'max_duties must be a positive integer'}), 400
+        if two_above < 0:
+            return jsonify({'error': 'two_above must be zero or a positive integer'}), 400
+        if not time_budget > 0:
+            return jsonify({'error': 'time_budget must be a positive number of seconds'}), 400
+
+        # Hall occupancy per exam slot, with the subject department for conflict checks
+        q = (db.session.query(ExamSlot.id, ExamSlot.date, ExamSlot.session, HallSeat.hall_id,
+                              func.coalesce(Subject.department, ExamSlot.department), func.count(HallSeat.id))
+             .join(HallSeat, HallSeat.exam_slot_id == ExamSlot.id)
+             .join(Subject, ExamSlot.subject_id == Subject.id))
+        if data.get('date_from'):
+            q = q.filter(ExamSlot.date >= _dt.strptime(data['date_from'], '%Y-%m-%d').date())
+        if data.get('date_to'):
+            q = q.filter(ExamSlot.date <= _dt.strptime(data['date_to'], '%Y-%m-%d').date())
+        rows = q.group_by(ExamSlot.id, ExamSlot.date, ExamSlot.session, HallSeat.hall_id,
+                          Subject.department, ExamSlot.department).all()
+        if not rows:
+            return jsonify({'error': 'No seated halls found to invigilate'}), 404
+
+        faculty = db.session.query(Faculty.id, Faculty.department).order_by(Faculty.id.asc()).all()
+        if not faculty:
+            return jsonify({'error': 'No faculty available for invigilation'}), 400
+
+        duties = build_hall_duties(rows)
+        plan = assign_invigilators(duties, faculty, max_duties=max_duties,
+                                   two_above=two_above, time_budget=time_budget)
+
+        # Replace previous assignments for the slots we just planned
+        slot_ids = sorted({r[0] for r in rows})
+        for i in range(0, len(slot_ids), 500):
+            (Invigilation.query
+             .filter(Invigilation.exam_slot_id.in_(slot_ids[i:i + 500]))
+             .delete(synchronize_session=False))
+
+        mappings = [
+            {'exam_slot_id': slot_id, 'hall_id': a['hall_id'], 'faculty_id': a['faculty_id'], 'role': 'Invigilator'}
+            for a in plan['assignments']
+            for slot_id in a['slot_ids']
+        ]
+        for i in range(0, len(mappings), 2000):
+            db.session.bulk_insert_mappings(Invigilation, mappings[i:i + 2000])
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Invigilators assigned',
+            'halls': len(duties),
+            'duties_assigned': len(plan['assignments']),
+            'rows_inserted': len(mappings),
+            'faculty_used': plan['faculty_used'],
+            'max_load': plan['max_load'],
+            'min_load': plan['min_load'],
+            'timed_out': plan['timed_out'],
+            'elapsed_ms': plan['elapsed_ms'],
+            'unfilled': [
+                {**u, 'date': u['date'].isoformat() if hasattr(u['date'], 'isoformat') else u['date']}
+                for u in plan['unfilled']
+            ]
+        })
+    except (TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'error': f'Invalid request: {str(e)}'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Invigilator assignment failed: {str(e)}'}), 500
+
+
 @app.route('/hall_ticket_pdf/<int:student_id>')
 def hall_ticket_pdf(student_id: int):
     if 'admin_id' not in session:
@@ -1676,57 +2229,31 @@ def hall_ticket_pdf(student_id: int):
         ex_date = _dt.strptime(date_str, '%Y-%m-%d').date()
     except Exception:
         return render_template('hall_ticket_error.html', message='Invalid date format')
+    etag = _export_etag(ex_date, sess)
+    cached = not_modified(etag)
+    if cached:
+        return cached
 
     student = Student.query.get_or_404(student_id)
-    # Find all seats for this student at date/session
-    records = (db.session.query(HallSeat, ExamSlot, Hall, Subject)
-               .join(ExamSlot, HallSeat.exam_slot_id == ExamSlot.id)
-               .join(Hall, HallSeat.hall_id == Hall.id)
-               .join(Subject, ExamSlot.subject_id == Subject.id)
-               .filter(HallSeat.student_id == student_id, ExamSlot.date == ex_date, ExamSlot.session == sess)
-               .all())
+    rec = _student_tickets(ex_date, sess, student_id).get(student_id) or {
+        'student_id': student.id,
+        'reg': student.reg_no or '',
+        'name': student.name,
+        'department': student.department,
+        'year': student.year,
+        'date': ex_date.isoformat(),
+        'session': sess,
+        'rows': [],
+    }
 
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    W, H = A4
-
-    # Header
-    c.setFont('Helvetica-Bold', 14)
-    c.drawString(20*mm, (H-20*mm), 'HALL TICKET')
-    c.setFont('Helvetica', 10)
-    c.drawString(20*mm, (H-26*mm), f"Name: {student.name}")
-    reg = student.email.split('@')[0] if student.email else ''
-    c.drawString(20*mm, (H-32*mm), f"Reg No: {reg}")
-    c.drawString(20*mm, (H-38*mm), f"Department: {student.department}  Year: {student.year}")
-    c.drawString(20*mm, (H-44*mm), f"Date: {ex_date.isoformat()}  Session: {sess}")
-
-    # QR code
-    qr = qrcode.make(f"{reg}|{ex_date}|{sess}")
-    qr_buf = BytesIO()
-    qr.save(qr_buf, format='PNG')
-    qr_buf.seek(0)
-    c.drawImage(qr_buf, (W-40*mm), (H-50*mm), 20*mm, 20*mm, preserveAspectRatio=True, mask='auto')
-
-    y = H - 60*mm
-    c.setFont('Helvetica-Bold', 10)
-    c.drawString(20*mm, y, 'Paper Code')
-    c.drawString(60*mm, y, 'Title')
-    c.drawString(150*mm, y, 'Hall/Seat')
-    y -= 6*mm
-    c.setFont('Helvetica', 10)
-    for hs, slot, hall, subj in records:
-        c.drawString(20*mm, y, subj.code)
-        c.drawString(60*mm, y, (subj.title[:50] + ('...' if len(subj.title) > 50 else '')))
-        c.drawString(150*mm, y, f"{hall.name} / {hs.seat_no}")
-        y -= 6*mm
-        if y < 20*mm:
-            c.showPage(); y = H - 20*mm
-
-    c.showPage()
-    c.save()
-    pdf = buf.getvalue()
-    buf.close()
-    return Response(pdf, mimetype='application/pdf', headers={'Content-Disposition': 'inline; filename=hall_ticket.pdf'})
+    # Served from the artifact store; the key changes whenever any printed field does
+    slot, key = _student_ticket_slot(rec), artifact_key('student_ticket', rec)
+    pdf = artifact_store.read(student.id, slot, key)
+    if pdf is None:
+        pdf = render_student_ticket_pdf(rec)
+        artifact_store.put(student.id, slot, key, pdf)
+    return with_etag(send_file(BytesIO(pdf), mimetype='application/pdf', download_name='hall_ticket.pdf',
+                               etag=False), etag)
 
 
 @app.route('/attendance_sheet_pdf')
@@ -1740,6 +2267,10 @@ def attendance_sheet_pdf():
         return render_template('hall_ticket_error.html', message='date, session, hall_id are required')
     from datetime import datetime as _dt
     ex_date = _dt.strptime(date_str, '%Y-%m-%d').date()
+    etag = _export_etag(ex_date, sess)
+    cached = not_modified(etag)
+    if cached:
+        return cached
 
     hall = Hall.query.get_or_404(hall_id)
     records = (db.session.query(HallSeat, ExamSlot, Student, Subject)
@@ -1752,50 +2283,86 @@ def attendance_sheet_pdf():
 
     buf = BytesIO()
     c = canvas.Canvas(buf, pagesize=A4)
-    W, H = A4
-    c.setFont('Helvetica-Bold', 12)
-    c.drawString(20*mm, (H-20*mm), f"Attendance Sheet - {hall.name}  {ex_date} {sess}")
-    y = H - 30*mm
-    c.setFont('Helvetica-Bold', 10)
-    c.drawString(20*mm, y, 'Seat')
-    c.drawString(35*mm, y, 'Reg No')
-    c.drawString(70*mm, y, 'Name')
-    c.drawString(150*mm, y, 'Sign')
-    y -= 6*mm
-    c.setFont('Helvetica', 10)
-    for hs, slot, stu, subj in records:
-        reg = stu.email.split('@')[0] if stu.email else ''
-        c.drawString(20*mm, y, str(hs.seat_no))
-        c.drawString(35*mm, y, reg)
-        c.drawString(70*mm, y, (stu.name[:40] + ('...' if len(stu.name) > 40 else '')))
-        c.line(150*mm, y-1*mm, (W-20*mm), y-1*mm)
-        y -= 7*mm
-        if y < 20*mm:
-            c.showPage(); y = H - 20*mm
+    draw_attendance_sheet(
+        c,
+        f"Attendance Sheet - {hall.name}  {ex_date} {sess}",
+        ((hs.seat_no, stu.reg_no or '', stu.name) for hs, slot, stu, subj in records)
+    )
     c.showPage(); c.save()
     pdf = buf.getvalue(); buf.close()
-    return Response(pdf, mimetype='application/pdf', headers={'Content-Disposition': 'inline; filename=attendance.pdf'})
+    return with_etag(Response(pdf, mimetype='application/pdf',
+                              headers={'Content-Disposition': 'inline; filename=attendance.pdf'}), etag)
 
 
-@app.route('/api/export/halltickets_zip', methods=['GET'])
-def export_halltickets_zip():
-    # Params: date=YYYY-MM-DD, session=FN|AN, optional subject_code, hall_id
+def _hall_attendance_sheets(ex_date, sess):
+    """One attendance sheet record per hall for date/session, from a single joined query."""
+    q = (db.session.query(Hall.id, Hall.name, HallSeat.seat_no, Student.reg_no, Student.name)
+         .select_from(HallSeat)
+         .join(ExamSlot, HallSeat.exam_slot_id == ExamSlot.id)
+         .join(Hall, HallSeat.hall_id == Hall.id)
+         .join(Student, HallSeat.student_id == Student.id)
+         .filter(ExamSlot.date == ex_date, ExamSlot.session == sess)
+         .order_by(Hall.name.asc(), Hall.id.asc(), HallSeat.seat_no.asc()))
+
+    sheets = []
+    for hall_id, hall_name, seat_no, reg_no, name in q.all():
+        if not sheets or sheets[-1]['hall_id'] != hall_id:
+            sheets.append({
+                'hall_id': hall_id,
+                'hall_name': hall_name,
+                'date': ex_date.isoformat(),
+                'session': sess,
+                'rows': [],
+            })
+        sheets[-1]['rows'].append((seat_no, reg_no or '', name))
+    return sheets
+
+
+@app.route('/api/export/attendance_sheets', methods=['GET'])
+def export_attendance_sheets():
+    # Params: date=YYYY-MM-DD, session=FN|AN, format=pdf|zip (default pdf)
+    # Every hall of the session in one request: a merged PDF or a ZIP of one PDF per hall
     if 'admin_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     date_str = request.args.get('date')
     sess = (request.args.get('session') or '').upper()
-    subject_code = request.args.get('subject_code')
-    hall_id = request.args.get('hall_id', type=int)
+    fmt = (request.args.get('format') or 'pdf').lower()
     if not date_str or not sess:
         return jsonify({'error': 'date and session required'}), 400
+    if fmt not in ('pdf', 'zip'):
+        return jsonify({'error': 'Invalid format. Use pdf or zip'}), 400
     from datetime import datetime as _dt
     try:
         ex_date = _dt.strptime(date_str, '%Y-%m-%d').date()
     except Exception:
         return jsonify({'error': 'Invalid date'}), 400
-
-    # Build query of (student, hallseat, hall, subject) at date/session
-    q = (db.session.query(Student, HallSeat, Hall, Subject)
+    etag = _export_etag(ex_date, sess)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    sheets = _hall_attendance_sheets(ex_date, sess)
+    if not sheets:
+        return jsonify({'error': 'No seats allocated'}), 404
+
+    base_name = f"attendance_{ex_date.isoformat()}_{sess}"
+    if fmt == 'zip':
+        # Halls are rendered in parallel workers and streamed as each one finishes
+        chunks = stream_zip(render_attendance_sheets(sheets, workers=app.config['HALLTICKET_WORKERS']))
+        return with_etag(Response(chunks, mimetype='application/zip',
+                                  headers={'Content-Disposition': f'attachment; filename={base_name}.zip',
+                                           'X-Accel-Buffering': 'no'}), etag)
+
+    fh = tempfile.TemporaryFile()
+    render_attendance_merged(sheets, fh)
+    fh.seek(0)
+    return with_etag(send_file(fh, mimetype='application/pdf', as_attachment=True, download_name=f'{base_name}.pdf'), etag)
+
+
+def _seated_tickets(ex_date, sess, subject_code=None, hall_id=None):
+    """Ticket records (plain dicts) for every seated student at date/session, in print order."""
+    q = (db.session.query(Student.id, Student.reg_no, Student.name, Student.department, Student.year,
+                          HallSeat.seat_no, Hall.name, Subject.code, Subject.title)
          .join(HallSeat, HallSeat.student_id == Student.id)
          .join(ExamSlot, HallSeat.exam_slot_id == ExamSlot.id)
          .join(Hall, HallSeat.hall_id == Hall.id)
@@ -1805,45 +2372,168 @@ def export_halltickets_zip():
         q = q.filter(Subject.code == subject_code)
     if hall_id:
         q = q.filter(Hall.id == hall_id)
+    q = q.order_by(Hall.name.asc(), HallSeat.seat_no.asc())
+
+    return [
+        {
+            'student_id': student_id,
+            'reg': reg_no or str(student_id),
+            'name': name,
+            'department': department,
+            'year': year,
+            'date': ex_date.isoformat(),
+            'session': sess,
+            'sub_code': sub_code,
+            'sub_title': sub_title,
+            'hall_name': hall_name,
+            'seat_no': seat_no,
+        }
+        for student_id, reg_no, name, department, year, seat_no, hall_name, sub_code, sub_title in q.all()
+    ]
+
+
+def _student_tickets(ex_date, sess, student_id=None):
+    """Per-student ticket records for date/session keyed by student id, from one joined query."""
+    q = (db.session.query(Student.id, Student.reg_no, Student.name, Student.department, Student.year,
+                          Subject.code, Subject.title, Hall.name, HallSeat.seat_no)
+         .join(HallSeat, HallSeat.student_id == Student.id)
+         .join(ExamSlot, HallSeat.exam_slot_id == ExamSlot.id)
+         .join(Hall, HallSeat.hall_id == Hall.id)
+         .join(Subject, ExamSlot.subject_id == Subject.id)
+         .filter(ExamSlot.date == ex_date, ExamSlot.session == sess))
+    if student_id:
+        q = q.filter(Student.id == student_id)
+    q = q.order_by(Student.id.asc(), ExamSlot.id.asc(), HallSeat.id.asc())
+
+    records = {}
+    for sid, reg_no, name, department, year, sub_code, sub_title, hall_name, seat_no in q.all():
+        rec = records.get(sid)
+        if rec is None:
+            rec = records[sid] = {
+                'student_id': sid,
+                'reg': reg_no or '',
+                'name': name,
+                'department': department,
+                'year': year,
+                'date': ex_date.isoformat(),
+                'session': sess,
+                'rows': [],
+            }
+        rec['rows'].append((sub_code, sub_title, hall_name, seat_no))
+    return records
+
+
+def _student_ticket_slot(rec):
+    # One stored student ticket per (date, session): a re-render replaces the old file
+    return artifact_slot('student_ticket', rec['date'], rec['session'])
+
+
+def _ticket_slot(t):
+    return artifact_slot('ticket', t['date'], t['session'], t['sub_code'])
+
+
+def _stored_tickets(tickets, workers):
+    """(filename, pdf) for each _seated_tickets record, in order.
+
+    Tickets already in the artifact store are read from disk; only the missing ones
+    are rendered (through the worker pool) and stored for the next download.
+    """
+    keys = [(_ticket_slot(t), artifact_key('ticket', t)) for t in tickets]
+    missing = {i for i, (t, k) in enumerate(zip(tickets, keys)) if artifact_store.get(t['student_id'], *k) is None}
+    rendered = render_tickets([tickets[i] for i in sorted(missing)], workers=workers, batch_size=8)
+    for i, (t, k) in enumerate(zip(tickets, keys)):
+        if i in missing:
+            _, pdf = next(rendered)
+            artifact_store.put(t['student_id'], *k, pdf)
+        else:
+            pdf = artifact_store.read(t['student_id'], *k)
+            if pdf is None:  # purged since the check
+                pdf = render_ticket_pdf(t)
+        yield ticket_filename(t), pdf
+
+
+def _prerender_tickets(ex_date, sess):
+    # Runs after allocation so exam-morning downloads are served straight from disk
+    with app.app_context():
+        try:
+            for rec in _student_tickets(ex_date, sess).values():
+                slot, key = _student_ticket_slot(rec), artifact_key('student_ticket', rec)
+                if artifact_store.get(rec['student_id'], slot, key) is None:
+                    artifact_store.put(rec['student_id'], slot, key, render_student_ticket_pdf(rec))
+            for _ in _stored_tickets(_seated_tickets(ex_date, sess), app.config['HALLTICKET_WORKERS']):
+                pass
+        except Exception as e:
+            app.logger.warning(f'Ticket pre-render failed for {ex_date} {sess}: {e}')
+        finally:
+            db.session.remove()
+
+
+@app.route('/api/export/halltickets_zip', methods=['GET'])
+def export_halltickets_zip():
+    # Params: date=YYYY-MM-DD, session=FN|AN, optional subject_code, hall_id
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    date_str = request.args.get('date')
+    sess = (request.args.get('session') or '').upper()
+    subject_code = request.args.get('subject_code')
+    hall_id = request.args.get('hall_id', type=int)
+    if not date_str or not sess:
+        return jsonify({'error': 'date and session required'}), 400
+    from datetime import datetime as _dt
+    try:
+        ex_date = _dt.strptime(date_str, '%Y-%m-%d').date()
+    except Exception:
+        return jsonify({'error': 'Invalid date'}), 400
+    etag = _export_etag(ex_date, sess)
+    cached = not_modified(etag)
+    if cached:
+        return cached
 
-    records = q.all()
-    if not records:
+    tickets = _seated_tickets(ex_date, sess, subject_code, hall_id)
+    if not tickets:
         return jsonify({'error': 'No tickets found'}), 404
 
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-    with zipfile.ZipFile(tmp.name, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for student, hs, hall, subj in records:
-            reg = student.email.split('@')[0] if student.email else str(student.id)
-            # Generate single-page PDF ticket buffer
-            buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4); W,H = A4
-            c.setFont('Helvetica-Bold', 14)
-            c.drawString(20*mm, (H-20*mm), 'HALL TICKET')
-            c.setFont('Helvetica', 10)
-            c.drawString(20*mm, (H-26*mm), f"Name: {student.name}")
-            c.drawString(20*mm, (H-32*mm), f"Reg No: {reg}")
-            c.drawString(20*mm, (H-38*mm), f"Department: {student.department}  Year: {student.year}")
-            c.drawString(20*mm, (H-44*mm), f"Date: {ex_date.isoformat()}  Session: {sess}")
-            # QR
-            qr = qrcode.make(f"{reg}|{ex_date}|{sess}|{subj.code}")
-            qb = BytesIO(); qr.save(qb, format='PNG'); qb.seek(0)
-            c.drawImage(qb, (W-40*mm), (H-50*mm), 20*mm, 20*mm, preserveAspectRatio=True, mask='auto')
-            # Row
-            y = H - 60*mm; c.setFont('Helvetica-Bold', 10)
-            c.drawString(20*mm, y, 'Paper Code'); c.drawString(60*mm, y, 'Title'); c.drawString(150*mm, y, 'Hall/Seat')
-            y -= 6*mm; c.setFont('Helvetica', 10)
-            c.drawString(20*mm, y, subj.code)
-            title = (subj.title[:50] + ('...' if len(subj.title) > 50 else ''))
-            c.drawString(60*mm, y, title)
-            c.drawString(150*mm, y, f"{hall.name} / {hs.seat_no}")
-            c.showPage(); c.save(); pdf = buf.getvalue(); buf.close()
-            fname = f"{reg}_{ex_date.isoformat()}_{sess}.pdf"
-            zf.writestr(fname, pdf)
-
-    with open(tmp.name, 'rb') as f:
-        zip_bytes = f.read()
-    os.unlink(tmp.name)
+    # Stream entries as each ticket is rendered; nothing is spooled to disk
     zip_name = f"halltickets_{ex_date.isoformat()}_{sess}.zip"
-    return Response(zip_bytes, mimetype='application/zip', headers={'Content-Disposition': f'attachment; filename={zip_name}'})
+    chunks = stream_zip(_stored_tickets(tickets, app.config['HALLTICKET_WORKERS']))
+    return with_etag(Response(chunks, mimetype='application/zip',
+                              headers={'Content-Disposition': f'attachment; filename={zip_name}',
+                                       'X-Accel-Buffering': 'no'}), etag)
+
+
+@app.route('/api/export/halltickets_pdf', methods=['GET'])
+def export_halltickets_pdf():
+    # Params: date=YYYY-MM-DD, session=FN|AN, optional subject_code, hall_id
+    # One multi-page document: fonts and the ticket frame are shared by every page
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    date_str = request.args.get('date')
+    sess = (request.args.get('session') or '').upper()
+    subject_code = request.args.get('subject_code')
+    hall_id = request.args.get('hall_id', type=int)
+    if not date_str or not sess:
+        return jsonify({'error': 'date and session required'}), 400
+    from datetime import datetime as _dt
+    try:
+        ex_date = _dt.strptime(date_str, '%Y-%m-%d').date()
+    except Exception:
+        return jsonify({'error': 'Invalid date'}), 400
+    etag = _export_etag(ex_date, sess)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    tickets = _seated_tickets(ex_date, sess, subject_code, hall_id)
+    if not tickets:
+        return jsonify({'error': 'No tickets found'}), 404
+
+    # reportlab assembles the document on save(); spool it to a temp file and
+    # let send_file stream it back in chunks
+    fh = tempfile.TemporaryFile()
+    render_tickets_merged(tickets, fh)
+    fh.seek(0)
+    pdf_name = f"halltickets_{ex_date.isoformat()}_{sess}.pdf"
+    return with_etag(send_file(fh, mimetype='application/pdf', as_attachment=True, download_name=pdf_name), etag)
 
 
 # New: Bulk timetable/allocation upload (Excel/CSV)
@@ -1905,10 +2595,7 @@ def upload_timetable():
 
         # Build a consistent 16-column view for Students page and persist to JSON
         try:
-            desired_cols = [
-                'SNO','ENQ','Reg_No','Name of the Student','Prog & Year','CLASS CODE','year','Degree','Dept',
-                'DEPT ORD','CLASS ORD','SUB ORD','SUB_CODE','SUB_TITLE','DATE','SESS'
-            ]
+            desired_cols = SHEET_COLUMNS
             # Helper to fetch by flexible naming using resolve()
             col_map = {}
             col_map['SNO'] = resolve(df.columns, 'sno')
@@ -1937,10 +2624,7 @@ def upload_timetable():
                     data_dict[dc] = ""
             display_df = pd.DataFrame(data_dict, columns=desired_cols).fillna("")
 
-            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-            json_path = os.path.join(app.config['UPLOAD_FOLDER'], 'last_students.json')
-            display_df.to_json(json_path, orient='records', force_ascii=False)
-            session['last_students_json'] = json_path
+            session['last_students_json'] = write_sheet(display_df, app.config['UPLOAD_FOLDER'])
         except Exception:
             # Non-fatal; continue normal timetable processing
             pass
@@ -1969,6 +2653,7 @@ def upload_timetable():
         total_created_exams = 0
         total_created_attendance = 0
         allocation_summary = []
+        registrations = []
 
         # Group by exam slot (dept, year, sub_code, date, sess)
         group_cols = [dept_col, year_col, sub_code_col, date_col, sess_col, sub_title_col]
@@ -1997,15 +2682,16 @@ def upload_timetable():
             for _, r in group_sorted.iterrows():
                 reg_no = str(r[reg_col]).strip()
                 student_name = str(r[name_col]).strip()
-                # Find or create student (using reg_no as email surrogate)
-                pseudo_email = f"{reg_no}@example.edu"
-                student = Student.query.filter_by(email=pseudo_email).first()
+                # Find or create student by register number
+                student = _student_for_reg(reg_no)
                 if not student:
-                    student = Student(name=student_name, email=pseudo_email, phone='0000000000', department=str(dept), year=str(year))
+                    student = Student(name=student_name, email=pseudo_email(reg_no), reg_no=reg_no,
+                                      phone='0000000000', department=str(dept), year=str(year))
                     db.session.add(student)
                     total_created_students += 1
                     db.session.flush()
                 students_in_slot.append(student)
+                registrations.append((reg_no, exam_date, sess_key, sub_code))
 
             # Allocate students to halls by capacity
             remaining = list(students_in_slot)
@@ -2046,12 +2732,15 @@ def upload_timetable():
 
         os.remove(file_path)
 
+        clashes = find_clashes(registrations)
         return jsonify({
             'message': 'Timetable processed successfully',
             'created_students': total_created_students,
             'created_exams': total_created_exams,
             'created_attendance': total_created_attendance,
-            'allocation': allocation_summary
+            'allocation': allocation_summary,
+            'clash_count': len(clashes),
+            'clashes': clashes
         }), 200
 
     except Exception as e:
@@ -2094,60 +2783,64 @@ def export_hall_tickets():
 
     # Fetch exams on that date matching time (exact HH:MM) if created by uploader
     target_time = datetime.strptime(time_str, '%H:%M').time()
-    exams = Exam.query.filter(Exam.date == target_date, Exam.time == target_time).all()
-    if not exams:
+    etag = _export_etag(target_date, sess)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    if not db.session.query(Exam.id).filter(Exam.date == target_date, Exam.time == target_time).first():
         return jsonify({'error': 'No exams found for given date/session'}), 404
 
-    # Build CSV
-    output = StringIO()
-    # Header
-    output.write('reg_no,student_name,department,year,subject,date,time,hall,seat_no\n')
-
-    for exam in exams:
-        # Attendance records are the allocation list
-        atts = Attendance.query.filter_by(exam_id=exam.id).order_by(Attendance.id.asc()).all()
-        # Seat numbers 1..N per hall (order by created id)
-        seat_no = 1
-        for att in atts:
-            student = att.student
-            # Derive reg_no from pseudo email pattern REGNO@example.edu if present
-            reg_no = ''
-            try:
-                if student and student.email and '@' in student.email:
-                    reg_no = student.email.split('@')[0]
-            except Exception:
-                reg_no = ''
-            output.write(','.join([
-                reg_no,
-                (student.name if student else '' ).replace(',', ' '),
-                (student.department if student else '').replace(',', ' '),
-                (student.year if student else '').replace(',', ' '),
-                (exam.subject or '').replace(',', ' '),
-                exam.date.isoformat() if exam.date else '',
-                exam.time.strftime('%H:%M') if exam.time else '',
-                (exam.hall.name if exam.hall else '').replace(',', ' '),
-                str(seat_no)
-            ]) + '\n')
+    # One joined query; attendance rows of an exam arrive together in allocation order
+    q = (db.session.query(Exam.id, Exam.subject, Exam.date, Exam.time, Hall.name,
+                          Student.reg_no, Student.name, Student.department, Student.year)
+         .join(Attendance, Attendance.exam_id == Exam.id)
+         .outerjoin(Student, Student.id == Attendance.student_id)
+         .outerjoin(Hall, Hall.id == Exam.hall_id)
+         .filter(Exam.date == target_date, Exam.time == target_time)
+         .order_by(Exam.id.asc(), Attendance.id.asc()))
+
+    def generate():
+        buf = StringIO()
+        writer = csv.writer(buf, lineterminator='\n')
+        writer.writerow(['reg_no', 'student_name', 'department', 'year', 'subject', 'date', 'time', 'hall', 'seat_no'])
+        current_exam = None
+        seat_no = 0
+        for exam_id, subject, ex_date, ex_time, hall_name, reg_no, name, dept, year in q.yield_per(1000):
+            # Seat numbers 1..N per hall (order by created id)
+            if exam_id != current_exam:
+                current_exam = exam_id
+                seat_no = 0
             seat_no += 1
-
-    csv_data = output.getvalue()
-    output.close()
+            writer.writerow([
+                reg_no or '',
+                name or '',
+                dept or '',
+                year or '',
+                subject or '',
+                ex_date.isoformat() if ex_date else '',
+                ex_time.strftime('%H:%M') if ex_time else '',
+                hall_name or '',
+                seat_no
+            ])
+            if buf.tell() > 64 * 1024:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
 
     filename = f"halltickets_{date_str}_{sess}.csv"
-    return Response(
-        csv_data,
+    return with_etag(Response(
+        stream_with_context(generate()),
         mimetype='text/csv',
         headers={'Content-Disposition': f'attachment; filename={filename}'}
-    )
+    ), etag)
 
 
-# Render hall ticket for a single student by date/session
-@app.route('/hall_ticket/<int:student_id>')
-def hall_ticket(student_id: int):
-    # Check if admin is logged in
-    if 'admin_id' not in session:
-        return redirect(url_for('login'))
+def _ticket_date_session():
+    """Parse ?date=YYYY-MM-DD&session=FN|AN|EV for the HTML ticket views.
 
+    Returns (date_str, session, date, time, error_message).
+    """
     date_str = request.args.get('date')
     sess = (request.args.get('session') or 'FN').upper()
     if not date_str:
@@ -2157,13 +2850,37 @@ def hall_ticket(student_id: int):
     try:
         target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
     except Exception:
-        return render_template('hall_ticket_error.html', message='Invalid date format. Use YYYY-MM-DD')
+        return date_str, sess, None, None, 'Invalid date format. Use YYYY-MM-DD'
 
     session_to_time = {'FN': '09:30', 'AN': '13:30', 'EV': '16:00'}
     time_str = session_to_time.get(sess)
     if not time_str:
-        return render_template('hall_ticket_error.html', message='Invalid session. Use FN, AN, or EV')
-    target_time = datetime.strptime(time_str, '%H:%M').time()
+        return date_str, sess, None, None, 'Invalid session. Use FN, AN, or EV'
+    return date_str, sess, target_date, datetime.strptime(time_str, '%H:%M').time(), None
+
+
+def _ticket_row(ex_date, sess, subject, hall_name, seat_no):
+    subject = subject or ''
+    return {
+        'date': ex_date.strftime('%d-%m-%Y') if ex_date else '',
+        'session': sess,
+        'paper_code': subject.split(' - ')[0],
+        'paper_title': ' - '.join(subject.split(' - ')[1:]) if ' - ' in subject else subject,
+        'hall_no': hall_name or '',
+        'seat_no': seat_no
+    }
+
+
+# Render hall ticket for a single student by date/session
+@app.route('/hall_ticket/<int:student_id>')
+def hall_ticket(student_id: int):
+    # Check if admin is logged in
+    if 'admin_id' not in session:
+        return redirect(url_for('login'))
+
+    date_str, sess, target_date, target_time, error = _ticket_date_session()
+    if error:
+        return render_template('hall_ticket_error.html', message=error)
 
     student = Student.query.get_or_404(student_id)
 
@@ -2179,28 +2896,68 @@ def hall_ticket(student_id: int):
     rows = []
     for idx, att in enumerate(atts, start=1):
         ex = att.exam
-        rows.append({
-            'date': ex.date.strftime('%d-%m-%Y') if ex.date else '',
-            'session': sess,
-            'paper_code': (ex.subject or '').split(' - ')[0],
-            'paper_title': ' - '.join((ex.subject or '').split(' - ')[1:]) if ' - ' in (ex.subject or '') else (ex.subject or ''),
-            'hall_no': ex.hall.name if ex and ex.hall else '',
-            'seat_no': idx
-        })
-
-    college = {
-        'name': 'KPR College of Arts Science and Research',
-        'subtitle': 'CIA - I EXAMINATIONS - AUGUST 2025',
-        'address': 'Avinashi Road, Arasur, Coimbatore-641 407.'
-    }
+        rows.append(_ticket_row(ex.date, sess, ex.subject, ex.hall.name if ex and ex.hall else '', idx))
 
     return render_template(
         'hall_ticket_single.html',
         student=student,
         programme_year=student.year,
-        register_no=(student.email.split('@')[0] if student.email else ''),
+        register_no=(student.reg_no or ''),
         rows=rows,
-        college=college,
+        college=app.config['COLLEGE_INFO'],
+        date_str=date_str,
+        session=sess
+    )
+
+
+# Printable hall tickets for every student of a session, optionally one hall
+@app.route('/hall_tickets/batch')
+def hall_tickets_batch():
+    # Check if admin is logged in
+    if 'admin_id' not in session:
+        return redirect(url_for('login'))
+
+    date_str, sess, target_date, target_time, error = _ticket_date_session()
+    if error:
+        return render_template('hall_ticket_error.html', message=error)
+    hall_id = request.args.get('hall_id', type=int)
+
+    # One joined query for the whole session instead of three per student
+    q = (
+        db.session.query(Student.id, Student.name, Student.reg_no, Student.year,
+                         Exam.date, Exam.subject, Hall.name)
+        .select_from(Attendance)
+        .join(Exam, Attendance.exam_id == Exam.id)
+        .join(Student, Attendance.student_id == Student.id)
+        .outerjoin(Hall, Exam.hall_id == Hall.id)
+        .filter(Exam.date == target_date, Exam.time == target_time)
+    )
+    if hall_id:
+        q = q.filter(Exam.hall_id == hall_id)
+    q = q.order_by(Student.id.asc(), Exam.time.asc(), Attendance.id.asc())
+
+    tickets = []
+    current = None
+    for student_id, name, reg_no, year, ex_date, subject, hall_name in q.all():
+        if current is None or current['id'] != student_id:
+            current = {
+                'id': student_id,
+                'student': {'name': name},
+                'programme_year': year,
+                'register_no': (reg_no or ''),
+                'hall': hall_name or '',
+                'rows': [],
+            }
+            tickets.append(current)
+        # Seat numbering matches /hall_ticket: position among the student's papers
+        current['rows'].append(_ticket_row(ex_date, sess, subject, hall_name, len(current['rows']) + 1))
+    # Print hall by hall so the stack can be handed out room-wise
+    tickets.sort(key=lambda t: t['hall'])
+
+    return render_template(
+        'hall_tickets_batch.html',
+        tickets=tickets,
+        college=app.config['COLLEGE_INFO'],
         date_str=date_str,
         session=sess
     )
@@ -2279,21 +3036,7 @@ def upload_halls():
 # Dashboard data
 @app.route('/api/dashboard')
 def dashboard_data():
-    total_students = Student.query.count()
-    total_staff = Staff.query.count()
-    total_halls = Hall.query.count()
-    total_exams = Exam.query.count()
-    
-    # Recent exams
-    recent_exams = Exam.query.order_by(Exam.date.desc()).limit(5).all()
-    
-    return jsonify({
-        'total_students': total_students,
-        'total_staff': total_staff,
-        'total_halls': total_halls,
-        'total_exams': total_exams,
-        'recent_exams': [exam.to_dict() for exam in recent_exams]
-    })
+    return jsonify(dashboard_cache.get())
 
 
 
@@ -2333,22 +3076,105 @@ def save_allotment():
         return jsonify({'error': f'Failed to save allotment: {str(e)}'}), 500
 
 # API to get allotted students history
+ALLOTTED_PAGE_MAX = 200
+
+
 @app.route('/api/allotted_students', methods=['GET'])
 def get_allotted_students():
+    # Optional: date=YYYY-MM-DD, session=FN|AN|EV
+    # Paging (keyset on exam id): limit=N [after_id=last exam id of previous page]
+    # Without limit/after_id every ongoing exam is returned as a plain array, as before.
+    paginate = 'limit' in request.args or 'after_id' in request.args
     try:
-        # Get exams with ongoing status (allotted exams)
-        allotted_exams = Exam.query.filter_by(status='ongoing').all()
-        
+        after_id = int(request.args.get('after_id', 0))
+        limit = min(int(request.args.get('limit', 50)), ALLOTTED_PAGE_MAX)
+        if limit <= 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'limit and after_id must be positive integers'}), 400
+
+    criteria = [Exam.status == 'ongoing']
+    date_str = request.args.get('date')
+    sess = (request.args.get('session') or '').upper()
+    try:
+        if date_str:
+            criteria.append(Exam.date == datetime.strptime(date_str, '%Y-%m-%d').date())
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    if sess:
+        session_to_time = {v: k for k, v in _SESSION_BY_TIME.items()}
+        if sess not in session_to_time:
+            return jsonify({'error': 'Invalid session. Use FN, AN, or EV'}), 400
+        criteria.append(Exam.time == datetime.strptime(session_to_time[sess], '%H:%M').time())
+    if after_id:
+        criteria.append(Exam.id > after_id)
+
+    try:
+        # The page of exam ids is a derived table (MySQL rejects LIMIT inside IN (...)),
+        # joined out to halls, staff, attendance and students in the same statement
+        page = db.session.query(Exam.id).filter(*criteria).order_by(Exam.id.asc())
+        if paginate:
+            page = page.limit(limit + 1)
+        page = page.subquery()
+        q = (db.session.query(Exam.id, Exam.subject, Exam.date, Exam.time, Exam.duration, Exam.hall_id,
+                              Exam.staff_id, Exam.department, Exam.year, Exam.status, Exam.created_at,
+                              Hall.name, Staff.name,
+                              Attendance.id, Attendance.student_id, Attendance.status, Attendance.remarks,
+                              Attendance.created_at, Student.name)
+             .select_from(page)
+             .join(Exam, Exam.id == page.c.id)
+             .outerjoin(Hall, Hall.id == Exam.hall_id)
+             .outerjoin(Staff, Staff.id == Exam.staff_id)
+             .outerjoin(Attendance, Attendance.exam_id == Exam.id)
+             .outerjoin(Student, Student.id == Attendance.student_id)
+             .order_by(Exam.id.asc(), Attendance.id.asc()))
+
+        # Rows arrive grouped by exam: build the nested response in one pass
         result = []
-        for exam in allotted_exams:
-            # Get attendance records for this exam
-            attendances = Attendance.query.filter_by(exam_id=exam.id).all()
-            
-            exam_data = exam.to_dict()
-            exam_data['attendances'] = [attendance.to_dict() for attendance in attendances]
-            result.append(exam_data)
-        
-        return jsonify(result)
+        exam_data = None
+        has_more = False
+        for (exam_id, subject, ex_date, ex_time, duration, hall_id, staff_id, dept, year, status, created_at,
+             hall_name, staff_name, att_id, student_id, att_status, remarks, att_created, student_name) in q.yield_per(1000):
+            if exam_data is None or exam_data['id'] != exam_id:
+                if paginate and len(result) == limit:
+                    has_more = True
+                    break
+                exam_data = {
+                    'id': exam_id,
+                    'subject': subject,
+                    'date': ex_date.isoformat() if ex_date else None,
+                    'time': ex_time.isoformat() if ex_time else None,
+                    'duration': duration,
+                    'hall_id': hall_id,
+                    'staff_id': staff_id,
+                    'department': dept,
+                    'year': year,
+                    'status': status,
+                    'created_at': created_at.isoformat() if created_at else None,
+                    'hall_name': hall_name,
+                    'staff_name': staff_name,
+                    'attendances': [],
+                }
+                result.append(exam_data)
+            if att_id is not None:
+                exam_data['attendances'].append({
+                    'id': att_id,
+                    'student_id': student_id,
+                    'exam_id': exam_id,
+                    'status': att_status,
+                    'remarks': remarks,
+                    'created_at': att_created.isoformat() if att_created else None,
+                    'student_name': student_name,
+                    'exam_subject': subject
+                })
+
+        if not paginate:
+            return jsonify(result)
+        return jsonify({
+            'exams': result,
+            'limit': limit,
+            'next_after_id': result[-1]['id'] if has_more else None,
+        })
     except Exception as e:
         return jsonify({'error': f'Failed to fetch allotted students: {str(e)}'}), 500
 
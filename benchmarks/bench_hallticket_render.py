@@ -0,0 +1,57 @@
+"""Benchmark hall-ticket PDF rendering across worker counts.
+
+Run from the repo root:  python -m benchmarks.bench_hallticket_render --tickets 2000
+Prints tickets/s and the speedup over a single in-process renderer.
+"""
+import argparse
+import os
+import time
+
+from ems_app.tickets import render_tickets
+
+
+def make_tickets(n: int):
+    return [
+        {
+            'reg': f"23BCA{i:05d}",
+            'name': f"Student {i}",
+            'department': 'BCA',
+            'year': 'II',
+            'date': '2025-11-03',
+            'session': 'FN',
+            'sub_code': f"23CA{i % 40:03d}",
+            'sub_title': 'Data Structures and Algorithms',
+            'hall_name': f"H{i // 60 + 1}",
+            'seat_no': i % 60 + 1,
+        }
+        for i in range(n)
+    ]
+
+
+def run(tickets, workers: int) -> float:
+    t0 = time.perf_counter()
+    total = 0
+    for _, pdf in render_tickets(tickets, workers=workers):
+        total += len(pdf)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--tickets', type=int, default=2000)
+    ap.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    tickets = make_tickets(args.tickets)
+    base = run(tickets, 1)
+    print(f"workers=1  {base:.2f}s  {args.tickets / base:.0f} tickets/s")
+    w = 2
+    while w <= args.max_workers:
+        run(tickets[:64], w)  # warm the pool
+        t = run(tickets, w)
+        print(f"workers={w:<2} {t:.2f}s  {args.tickets / t:.0f} tickets/s  speedup={base / t:.2f}x")
+        w *= 2
+
+
+if __name__ == '__main__':
+    main()
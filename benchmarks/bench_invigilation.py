@@ -0,0 +1,52 @@
+"""Benchmark the invigilator assignment engine.
+
+Run from the repo root:  python -m benchmarks.bench_invigilation
+Default scale: 2,000 faculty x 300 halls x 30 sessions (15 days, FN/AN).
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from ems_app.invigilation import build_hall_duties, assign_invigilators
+
+
+def make_rows(halls: int, sessions: int, departments: int, seed: int = 7):
+    rnd = random.Random(seed)
+    rows = []
+    start = date(2025, 11, 3)
+    slot_id = 0
+    for s in range(sessions):
+        day = start + timedelta(days=s // 2)
+        sess = 'FN' if s % 2 == 0 else 'AN'
+        for hall_id in range(1, halls + 1):
+            # One or two subjects per hall
+            for _ in range(rnd.choice((1, 1, 2))):
+                slot_id += 1
+                rows.append((slot_id, day, sess, hall_id, f"D{rnd.randrange(departments)}", rnd.randint(10, 30)))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--faculty', type=int, default=2000)
+    ap.add_argument('--halls', type=int, default=300)
+    ap.add_argument('--sessions', type=int, default=30)
+    ap.add_argument('--departments', type=int, default=20)
+    ap.add_argument('--max-duties', type=int, default=8)
+    ap.add_argument('--time-budget', type=float, default=10.0)
+    args = ap.parse_args()
+
+    rnd = random.Random(11)
+    faculty = [(i, f"D{rnd.randrange(args.departments)}") for i in range(1, args.faculty + 1)]
+    rows = make_rows(args.halls, args.sessions, args.departments)
+    duties = build_hall_duties(rows)
+    plan = assign_invigilators(duties, faculty, max_duties=args.max_duties, time_budget=args.time_budget)
+
+    print(f"faculty={args.faculty} halls={args.halls} sessions={args.sessions} duties={len(duties)}")
+    print(f"assigned={len(plan['assignments'])} unfilled={len(plan['unfilled'])} timed_out={plan['timed_out']}")
+    print(f"load min/max={plan['min_load']}/{plan['max_load']} faculty_used={plan['faculty_used']}")
+    print(f"elapsed={plan['elapsed_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Per-page render time and size: shared Form XObject frame vs. redrawing it per page.
+
+Run from the repo root:  python -m benchmarks.bench_pdf_templates --pages 2000
+"""
+import argparse
+import time
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from ems_app.tickets import draw_ticket_page
+from benchmarks.bench_hallticket_render import make_tickets
+
+W, H = A4
+
+
+def inline_page(c, rec):
+    # The pre-template layout: every label redrawn on every page
+    c.setFont('Helvetica-Bold', 14)
+    c.drawString(20*mm, (H-20*mm), 'HALL TICKET')
+    c.setFont('Helvetica', 10)
+    c.drawString(20*mm, (H-26*mm), f"Name: {rec['name']}")
+    c.drawString(20*mm, (H-32*mm), f"Reg No: {rec['reg']}")
+    c.drawString(20*mm, (H-38*mm), f"Department: {rec['department']}  Year: {rec['year']}")
+    c.drawString(20*mm, (H-44*mm), f"Date: {rec['date']}  Session: {rec['session']}")
+    y = H - 60*mm; c.setFont('Helvetica-Bold', 10)
+    c.drawString(20*mm, y, 'Paper Code'); c.drawString(60*mm, y, 'Title'); c.drawString(150*mm, y, 'Hall/Seat')
+    y -= 6*mm; c.setFont('Helvetica', 10)
+    c.drawString(20*mm, y, rec['sub_code'])
+    c.drawString(60*mm, y, rec['sub_title'])
+    c.drawString(150*mm, y, f"{rec['hall_name']} / {rec['seat_no']}")
+
+
+def form_page(c, rec):
+    draw_ticket_page(c, rec)
+
+
+def attendance_inline(c, rows):
+    for page in range(0, len(rows), 34):
+        c.setFont('Helvetica-Bold', 12)
+        c.drawString(20*mm, (H-20*mm), 'Attendance Sheet - H1  2025-11-03 FN')
+        y = H - 30*mm
+        c.setFont('Helvetica-Bold', 10)
+        c.drawString(20*mm, y, 'Seat'); c.drawString(35*mm, y, 'Reg No')
+        c.drawString(70*mm, y, 'Name'); c.drawString(150*mm, y, 'Sign')
+        y -= 6*mm
+        c.setFont('Helvetica', 10)
+        for seat, reg, name in rows[page:page + 34]:
+            c.drawString(20*mm, y, str(seat)); c.drawString(35*mm, y, reg); c.drawString(70*mm, y, name)
+            c.line(150*mm, y-1*mm, (W-20*mm), y-1*mm)
+            y -= 7*mm
+        c.showPage()
+
+
+def single_ticket(rec, shared: bool) -> bytes:
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    draw_ticket_page(c, rec, shared_frame=shared)
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def run(tickets, draw, with_qr: bool):
+    from ems_app.qr import draw_qr
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    t0 = time.perf_counter()
+    for rec in tickets:
+        draw(c, rec)
+        if with_qr and draw is inline_page:
+            draw_qr(c, f"{rec['reg']}|{rec['date']}|{rec['session']}|{rec['sub_code']}", (W-40*mm), (H-50*mm), 20*mm)
+        c.showPage()
+    c.save()
+    return (time.perf_counter() - t0) / len(tickets) * 1000, len(buf.getvalue())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--pages', type=int, default=2000)
+    args = ap.parse_args()
+    tickets = make_tickets(args.pages)
+    # Warm the QR cache so both variants measure page drawing only
+    run(tickets, form_page, True)
+    print('hall tickets (incl. QR):')
+    for label, draw in (('inline frame', inline_page), ('form xobject', form_page)):
+        ms, size = run(tickets, draw, True)
+        print(f"  {label:<13} {ms:.3f} ms/page  {size / 1024:.0f} KiB total  {size / args.pages:.0f} B/page")
+
+    # The ZIP path renders one ticket per document, where a form has nothing to share
+    print('one ticket per document:')
+    for label, shared in (('inline frame', False), ('form xobject', True)):
+        t0 = time.perf_counter()
+        size = sum(len(single_ticket(rec, shared)) for rec in tickets)
+        ms = (time.perf_counter() - t0) / len(tickets) * 1000
+        print(f"  {label:<13} {ms:.3f} ms/doc  {size / len(tickets):.0f} B/doc")
+
+    from ems_app.tickets import draw_attendance_sheet
+    rows = [(i % 60 + 1, t['reg'], t['name']) for i, t in enumerate(tickets)]
+    pages = (len(rows) + 33) // 34
+    print('attendance sheets:')
+    for label, fn in (('inline frame', lambda c: attendance_inline(c, rows)),
+                      ('form xobject', lambda c: (draw_attendance_sheet(c, 'Attendance Sheet - H1  2025-11-03 FN', rows), c.showPage()))):
+        buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
+        t0 = time.perf_counter(); fn(c); c.save()
+        ms = (time.perf_counter() - t0) / pages * 1000
+        print(f"  {label:<13} {ms:.3f} ms/page  {len(buf.getvalue()) / 1024:.0f} KiB total")
+
+
+if __name__ == '__main__':
+    main()
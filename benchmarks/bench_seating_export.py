@@ -0,0 +1,84 @@
+"""End-to-end latency of the standalone exam_seating_app upload.
+
+Run from the repo root:  python -m benchmarks.bench_seating_export [--rows 200000]
+
+Reports how long POST /allocate takes to return the result page and how long
+until the background workbook is downloadable, next to the cost of the pieces
+the request used to run inline (summary twice + synchronous Excel write).
+"""
+import argparse
+import io
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from exam_seating_app import app as seating
+
+
+def make_csv(rows: int, subjects: int = 400, seed: int = 7) -> bytes:
+    rnd = random.Random(seed)
+    dates = [f"{d:02d}-11-2025" for d in range(3, 18)]
+    recs = []
+    for i in range(rows):
+        sub = rnd.randrange(subjects)
+        recs.append({
+            'Reg_No': f"23BCA{i:06d}",
+            'Name of the Student': f"Student {i}",
+            'SUB_CODE': f"S{sub:04d}",
+            'SUB_TITLE': f"Subject {sub}",
+            'DATE': dates[sub % len(dates)],
+            'SESS': 'FN' if sub % 2 == 0 else 'AN',
+            'CLASS CODE': f"C{rnd.randrange(40)}",
+            'Dept': f"D{rnd.randrange(12)}",
+        })
+    buf = io.StringIO()
+    pd.DataFrame(recs).to_csv(buf, index=False)
+    return buf.getvalue().encode('utf-8')
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=200_000)
+    ap.add_argument('--capacity', type=int, default=30)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seating.UPLOAD_FOLDER = tmp
+        seating.OUTPUT_FOLDER = tmp
+        payload = make_csv(args.rows)
+        print(f"rows={args.rows}  csv={len(payload) / 1e6:.1f} MB")
+
+        # Pieces that used to sit on the request path
+        norm = seating.normalize_columns(pd.read_csv(io.BytesIO(payload), dtype=str))
+        t0 = time.perf_counter(); alloc = seating.allocate_seats(norm, hall_capacity=args.capacity)
+        t_alloc = time.perf_counter() - t0
+        t0 = time.perf_counter(); summary = seating.build_summary(alloc)
+        t_summary = time.perf_counter() - t0
+        t0 = time.perf_counter(); seating.generate_excel(alloc, summary)
+        t_excel = time.perf_counter() - t0
+        print(f"allocate_seats   {t_alloc:8.2f}s")
+        print(f"build_summary    {t_summary:8.2f}s  (was computed twice per request)")
+        print(f"generate_excel   {t_excel:8.2f}s  (was written before the page rendered)")
+
+        client = seating.app.test_client()
+        t0 = time.perf_counter()
+        resp = client.post('/allocate', data={'capacity': str(args.capacity),
+                                              'file': (io.BytesIO(payload), 'students.csv')},
+                           content_type='multipart/form-data')
+        t_page = time.perf_counter() - t0
+        assert resp.status_code == 200, resp.status_code
+        filename = next(name for name in seating._exports)
+        while client.get(f'/download/{filename}/status').get_json()['status'] == 'pending':
+            time.sleep(0.2)
+        t_ready = time.perf_counter() - t0
+        assert client.get(f'/download/{filename}').status_code == 200
+
+        print(f"result page      {t_page:8.2f}s")
+        print(f"excel ready      {t_ready:8.2f}s")
+        print(f"old page latency ~{t_page + t_summary + t_excel:7.2f}s  (page + 2nd summary + inline Excel)")
+
+
+if __name__ == '__main__':
+    main()
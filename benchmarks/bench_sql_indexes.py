@@ -0,0 +1,178 @@
+"""Hot-path SQL latency before and after the index migration, at 1M attendance rows.
+
+Run from the repo root:  python -m benchmarks.bench_sql_indexes [--attendance 1000000] [--url URL]
+
+By default it uses a throwaway SQLite file. ``--url`` points it at another
+database (e.g. mysql+pymysql://user:pw@localhost/scratch); every table in it is
+dropped and recreated, so only ever pass a scratch database.
+
+The schema starts without the indexes of migration 1 (as on a database created
+before they existed), is seeded, and each hot query is timed. Then
+ems_app.migrations.migrate() runs and the same queries are timed again.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+ap = argparse.ArgumentParser()
+ap.add_argument('--attendance', type=int, default=1_000_000)
+ap.add_argument('--url', default=None)
+ap.add_argument('--repeat', type=int, default=5)
+args = ap.parse_args()
+
+_tmp = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = args.url or f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ['USE_MONGO'] = 'false'
+os.environ['ARTIFACT_DIR'] = os.path.join(_tmp, 'artifacts')
+os.environ['ARTIFACT_PRERENDER'] = 'false'
+
+from sqlalchemy import text  # noqa: E402
+
+import app as A  # noqa: E402
+from ems_app.migrations import HOT_PATH_INDEXES, migrate, schema_version  # noqa: E402
+
+TIMES = [dtime(9, 30), dtime(13, 30), dtime(16, 0)]
+SESSIONS = ['FN', 'AN']
+DAYS = 60
+
+
+def drop_hot_path_indexes(conn):
+    quote = conn.dialect.identifier_preparer.quote
+    for table, name, _ in HOT_PATH_INDEXES:
+        if conn.dialect.name == 'mysql':
+            conn.execute(text(f"DROP INDEX {quote(name)} ON {quote(table)}"))
+        else:
+            conn.execute(text(f"DROP INDEX IF EXISTS {quote(name)}"))
+    conn.execute(schema_version.delete())
+
+
+def seed(n_attendance, per_exam=2000, n_students=20000, seats_per_slot=330):
+    rnd = random.Random(3)
+    db = A.db
+    n_exams = max(1, n_attendance // per_exam)
+    now = datetime.utcnow()
+    start = date(2025, 11, 3)
+    with db.engine.begin() as conn:
+        conn.execute(A.Hall.__table__.insert(), [
+            {'name': f'H{i}', 'capacity': 60, 'location': 'Block A', 'created_at': now} for i in range(50)])
+        conn.execute(A.Staff.__table__.insert(), [
+            {'name': f'Staff {i}', 'email': f's{i}@x.edu', 'phone': '9999999999', 'department': 'CS',
+             'role': 'Faculty', 'created_at': now} for i in range(50)])
+        conn.execute(A.Student.__table__.insert(), [
+            {'name': f'Student {i}', 'email': f'23CS{i:05d}@x.edu', 'phone': '9999999999',
+             'department': f'D{i % 12}', 'year': ['I', 'II', 'III'][i % 3], 'created_at': now}
+            for i in range(n_students)])
+        conn.execute(A.Exam.__table__.insert(), [
+            {'subject': f'CS{e:03d} - Paper {e}', 'date': start + timedelta(days=e % DAYS), 'time': TIMES[e % 3],
+             'duration': 180, 'hall_id': 1 + e % 50, 'staff_id': 1 + e % 50, 'department': 'CS', 'year': 'II',
+             'status': 'ongoing' if e % 10 == 0 else 'completed', 'created_at': now} for e in range(n_exams)])
+        # Attendance arrives exam by exam, so one student's rows are scattered across the table
+        batch = []
+        for e in range(n_exams):
+            for s in rnd.sample(range(1, n_students + 1), per_exam):
+                batch.append({'student_id': s, 'exam_id': e + 1, 'status': 'Absent', 'remarks': '', 'created_at': now})
+            if len(batch) >= 50_000:
+                conn.execute(A.Attendance.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(A.Attendance.__table__.insert(), batch)
+
+        conn.execute(A.Subject.__table__.insert(), [
+            {'code': f'CS{i:03d}', 'title': f'Paper {i}', 'department': 'CS', 'year': 'II'} for i in range(300)])
+        slots = [{'date': start + timedelta(days=d), 'session': s, 'subject_id': 1 + (d * 5 + k) % 300,
+                  'department': 'CS', 'year': 'II'}
+                 for d in range(DAYS) for s in SESSIONS for k in range(5)]
+        conn.execute(A.ExamSlot.__table__.insert(), slots)
+        seats = []
+        for slot_id in range(1, len(slots) + 1):
+            for i, s in enumerate(rnd.sample(range(1, n_students + 1), seats_per_slot)):
+                seats.append({'exam_slot_id': slot_id, 'hall_id': 1 + i // 60, 'seat_no': 1 + i % 60,
+                              'desk_no': 1 + (i % 60) // 2, 'student_id': s})
+        for i in range(0, len(seats), 50_000):
+            conn.execute(A.HallSeat.__table__.insert(), seats[i:i + 50_000])
+    return n_exams
+
+
+def queries(n_exams):
+    db, Exam, Attendance, Student, HallSeat, ExamSlot = A.db, A.Exam, A.Attendance, A.Student, A.HallSeat, A.ExamSlot
+    d, t = date(2025, 11, 3) + timedelta(days=7), TIMES[1]
+    student_id = 4242
+    return [
+        ('hall_ticket: one student, date+time', lambda: (
+            db.session.query(Attendance.id, Exam.subject)
+            .join(Exam, Attendance.exam_id == Exam.id)
+            .filter(Attendance.student_id == student_id, Exam.date == d, Exam.time == t).all())),
+        ('attendance sheet: date+time', lambda: (
+            db.session.query(Exam.id, Attendance.id, Student.name)
+            .join(Attendance, Attendance.exam_id == Exam.id)
+            .join(Student, Student.id == Attendance.student_id)
+            .filter(Exam.date == d, Exam.time == t).all())),
+        ('allotted page: ongoing by id', lambda: (
+            db.session.query(Exam.id).filter(Exam.status == 'ongoing', Exam.id > n_exams // 2)
+            .order_by(Exam.id).limit(51).all())),
+        ('attendance of one exam', lambda: (
+            db.session.query(Attendance.id).filter(Attendance.exam_id == n_exams // 2).all())),
+        ('delete_student: attendance count', lambda: (
+            db.session.query(db.func.count(Attendance.id)).filter(Attendance.student_id == student_id).scalar())),
+        ('ticket pdf: seats of one student', lambda: (
+            db.session.query(HallSeat.seat_no, ExamSlot.date)
+            .join(ExamSlot, ExamSlot.id == HallSeat.exam_slot_id)
+            .filter(HallSeat.student_id == student_id, ExamSlot.date == d, ExamSlot.session == 'AN').all())),
+        ('hall seats of one hall', lambda: (
+            db.session.query(db.func.count(HallSeat.id)).filter(HallSeat.hall_id == 3).scalar())),
+        ('students page: year keyset', lambda: (
+            db.session.query(Student.id, Student.name).filter(Student.year == 'II', Student.id > 10000)
+            .order_by(Student.id).limit(100).all())),
+        ('students page: department keyset', lambda: (
+            db.session.query(Student.id, Student.name).filter(Student.department == 'D5', Student.id > 10000)
+            .order_by(Student.id).limit(100).all())),
+    ]
+
+
+def time_all(qs, repeat):
+    out = []
+    for label, fn in qs:
+        fn()  # warm the page cache
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+            A.db.session.rollback()
+        out.append(statistics.median(samples))
+    return out
+
+
+def main() -> int:
+    with A.app.app_context():
+        A.db.drop_all()
+        A.db.create_all()
+        with A.db.engine.begin() as conn:
+            drop_hot_path_indexes(conn)
+        t0 = time.perf_counter()
+        n_exams = seed(args.attendance)
+        print(f"{A.db.engine.dialect.name}: seeded {args.attendance:,} attendance rows "
+              f"({n_exams} exams) in {time.perf_counter() - t0:.1f}s")
+
+        qs = queries(n_exams)
+        before = time_all(qs, args.repeat)
+        t0 = time.perf_counter()
+        applied = migrate(A.db.engine)
+        print(f"migrate() applied {applied} in {time.perf_counter() - t0:.1f}s")
+        if A.db.engine.dialect.name == 'sqlite':
+            A.db.session.execute(text('ANALYZE'))
+        after = time_all(qs, args.repeat)
+
+    print(f"\n{'query (median ms)':40}{'before':>10}{'after':>10}{'speedup':>10}")
+    for (label, _), b, a in zip(qs, before, after):
+        print(f"{label:40}{b:10.2f}{a:10.2f}{b / a if a else float('inf'):9.0f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Check that every hot Mongo query shape is served by an index in ems_app.indexes.
+
+Run from the repo root:  python -m benchmarks.check_mongo_indexes [--uri mongodb://localhost:27017]
+
+Against a reachable mongod the registry is applied to a scratch database and each
+shape is explain()ed: a COLLSCAN or a blocking SORT stage in the winning plan is
+a failure. Without a server (or with --mock) the registry is applied to mongomock,
+which has no query planner, and each shape is checked statically against the
+declared key patterns with the same (slightly stricter) rules. Exits non-zero on failure.
+"""
+import argparse
+import sys
+import uuid
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING, MongoClient
+
+from ems_app.blueprints.students import _decode_cursor, _encode_cursor
+from ems_app.indexes import INDEXES, ensure_indexes
+
+RAW_ORDER = [('DATE', ASCENDING), ('SESS', ASCENDING), ('Reg_No', ASCENDING), ('_id', ASCENDING)]
+# The $or clause /api/v2/students adds for every page after the first
+PAGE_2 = _decode_cursor(_encode_cursor({'DATE': '03-11-2025', 'SESS': 'FN', 'Reg_No': '23BCA001', '_id': ObjectId()}))
+
+# (label, collection, filter, sort) for every query the app runs per request
+HOT_QUERIES = [
+    ('students by email', 'students', {'email': 'a@x.edu'}, None),
+    ('students by id', 'students', {'id': 7}, None),
+    ('students page', 'students', {'id': {'$gt': 100}}, [('id', ASCENDING)]),
+    ('students dept+year page', 'students', {'department': 'BCA', 'year': 'II', 'id': {'$gt': 100}}, [('id', ASCENDING)]),
+    ('students year page', 'students', {'year': 'II'}, [('id', ASCENDING)]),
+    ('students dept page', 'students', {'department': 'BCA', 'id': {'$gt': 100}}, [('id', ASCENDING)]),
+    ('students reg_no lookup', 'students', {'reg_no': '23BCA001'}, [('reg_no', ASCENDING)]),
+    ('students reg_no prefix', 'students', {'reg_no': {'$gte': '23BCA', '$lt': '23BCB'}}, [('reg_no', ASCENDING)]),
+    ('allocate_v2 rows', 'students_raw', {'DATE': '2025-11-03', 'SESS': 'FN'}, None),
+    ('clash pipeline $match+$sort', 'students_raw', {'DATE': '2025-11-03', 'SESS': 'FN'},
+     [('DATE', ASCENDING), ('SESS', ASCENDING), ('Reg_No', ASCENDING)]),
+    ('v2 students all', 'students_raw', {}, RAW_ORDER),
+    ('v2 students date', 'students_raw', {'DATE': {'$in': ['2025-11-03', '03-11-2025']}}, RAW_ORDER),
+    ('v2 students date+session', 'students_raw', {'DATE': '03-11-2025', 'SESS': 'FN'}, RAW_ORDER),
+    ('v2 students sub_code', 'students_raw', {'SUB_CODE': 'CA1'}, RAW_ORDER),
+    ('v2 students sub_code+date+session', 'students_raw', {'SUB_CODE': 'CA1', 'DATE': '03-11-2025', 'SESS': 'FN'}, RAW_ORDER),
+    ('v2 students dept', 'students_raw', {'Dept': 'BCA'}, RAW_ORDER),
+    ('v2 students all, page 2', 'students_raw', PAGE_2, RAW_ORDER),
+    ('v2 students date+session, page 2', 'students_raw',
+     {'$and': [{'DATE': '03-11-2025', 'SESS': 'FN'}, PAGE_2]}, RAW_ORDER),
+    ('v2 students sub_code, page 2', 'students_raw', {'$and': [{'SUB_CODE': 'CA1'}, PAGE_2]}, RAW_ORDER),
+    ('v2 students dept, page 2', 'students_raw', {'$and': [{'Dept': 'BCA'}, PAGE_2]}, RAW_ORDER),
+    ('v2 exports hall_seats', 'hall_seats', {'date': '2025-11-03', 'session': 'FN'},
+     [('hall_name', ASCENDING), ('seat_no', ASCENDING)]),
+    ('allocate_v2 halls', 'halls', {}, [('capacity', DESCENDING)]),
+    ('data versions', 'data_versions', {'_id': {'$in': ['2025-11-03/FN']}}, None),
+]
+
+
+# --- static check (mongomock) --------------------------------------------------
+
+def _is_equality(cond):
+    if not isinstance(cond, dict):
+        return True
+    return set(cond) <= {'$eq', '$in'}
+
+
+def _serves(keys, flt, sort):
+    """(bounded, sorted): leading index keys the filter bounds, and whether the scan yields ``sort``."""
+    fields = [f for f in flt if not f.startswith('$')]
+    equal = {f for f in fields if _is_equality(flt[f])}
+    bounded = 0
+    for field, _ in keys:
+        if field not in fields:
+            break
+        bounded += 1
+        if field not in equal:
+            break
+    provides_sort = True
+    if sort:
+        i, flip = 0, None
+        for field, direction in keys:
+            if i < len(sort) and field == sort[i][0]:
+                same = direction == sort[i][1]
+                if flip is None:
+                    flip = not same
+                elif flip == same:
+                    break
+                i += 1
+            elif field in equal:
+                continue
+            else:
+                break
+        provides_sort = i == len(sort)
+    return bounded, provides_sort
+
+
+def _flatten(flt):
+    """(plain field conditions, list of $or branch lists) of a filter, with $and merged in."""
+    plain, ors = {}, []
+    for key, cond in flt.items():
+        if key == '$and':
+            for sub in cond:
+                sub_plain, sub_ors = _flatten(sub)
+                plain.update(sub_plain)
+                ors += sub_ors
+        elif key == '$or':
+            ors.append(cond)
+        else:
+            plain[key] = cond
+    return plain, ors
+
+
+def _best_index(collection, flt, sort, full_scan_ok):
+    keys_by_name = {'_id_': [('_id', ASCENDING)]}
+    keys_by_name.update({spec['name']: spec['keys'] for spec in INDEXES.get(collection, [])})
+    candidates = []
+    for name, keys in keys_by_name.items():
+        bounded, sorted_ = _serves(keys, flt, sort)
+        if bounded or (full_scan_ok and sort and sorted_):
+            candidates.append((sorted_, bounded, name))
+    return max(candidates) if candidates else None
+
+
+def static_plan(collection, flt, sort):
+    """Best index by bounded prefix. Stricter than mongod: a filtered query must bound
+    the index it walks, a full index scan only counts for an unfiltered sort. A bare
+    $or must bound an index in every branch; with a sort each branch's index must
+    yield it, so the branches merge without a SORT stage."""
+    plain, ors = _flatten(flt)
+    best = _best_index(collection, plain, sort, full_scan_ok=not plain and not ors)
+    if best is not None:
+        sorted_, _, name = best
+        return (f'IXSCAN {name}', True) if sorted_ else (f'IXSCAN {name} + SORT', False)
+    if len(ors) != 1:
+        return 'COLLSCAN', False
+    branches = [_best_index(collection, {**plain, **branch}, sort, full_scan_ok=False) for branch in ors[0]]
+    if any(b is None for b in branches):
+        return 'COLLSCAN', False
+    names = ' | '.join(name for _, _, name in branches)
+    if all(sorted_ for sorted_, _, _ in branches):
+        return (f'SORT_MERGE(IXSCAN {names})', True) if sort else (f'OR(IXSCAN {names})', True)
+    return f'OR(IXSCAN {names}) + SORT', False
+
+
+# --- explain (mongod) -------------------------------------------------------------
+
+def _stages(plan):
+    if not isinstance(plan, dict):
+        return
+    if 'stage' in plan:
+        yield plan
+    for key in ('inputStage', 'queryPlan', 'outerStage', 'innerStage'):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get('inputStages', []):
+        yield from _stages(child)
+
+
+def explain_plan(db, collection, flt, sort):
+    cursor = db.get_collection(collection).find(flt)
+    if sort:
+        cursor = cursor.sort(sort)
+    winning = cursor.explain()['queryPlanner']['winningPlan']
+    stages = list(_stages(winning))
+    names = [s['stage'] for s in stages]
+    summary = ' <- '.join(n + (f" {s['indexName']}" if s.get('indexName') else '') for n, s in zip(names, stages))
+    return summary, not ({'COLLSCAN', 'SORT'} & set(names))
+
+
+def _connect(uri):
+    try:
+        client = MongoClient(uri, serverSelectionTimeoutMS=1500)
+        client.admin.command('ping')
+        return client
+    except Exception:
+        return None
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--uri', default='mongodb://localhost:27017')
+    ap.add_argument('--mock', action='store_true', help='skip mongod, check statically on mongomock')
+    args = ap.parse_args()
+
+    client = None if args.mock else _connect(args.uri)
+    if client is None:
+        import mongomock
+        client = mongomock.MongoClient()
+        mode = 'mongomock (static)'
+    else:
+        mode = f'mongod {args.uri} (explain)'
+    db_name = f'index_check_{uuid.uuid4().hex[:8]}'
+    db = client[db_name]
+
+    ok = True
+    try:
+        created = ensure_indexes(db)
+        again = ensure_indexes(db)
+        print(f"{mode}: created {len(created)} indexes; re-apply created {len(again)}")
+        if again:
+            print(f"FAIL ensure_indexes is not idempotent: {again}")
+            ok = False
+
+        for label, collection, flt, sort in HOT_QUERIES:
+            if mode.startswith('mongod'):
+                plan, good = explain_plan(db, collection, flt, sort)
+            else:
+                plan, good = static_plan(collection, flt, sort)
+            print(f"{'ok ' if good else 'BAD'} {label:36} {plan}")
+            ok = ok and good
+    finally:
+        client.drop_database(db_name)
+
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Check that list endpoints issue a constant number of SQL queries.
+
+Run from the repo root:  python -m benchmarks.check_query_counts
+
+Seeds a throwaway SQLite database at two sizes and counts the statements each
+endpoint executes. The counts must not grow with the data (no N+1), and the
+fast serialization paths must return exactly what the ORM to_dict() methods do.
+Exits non-zero on failure.
+"""
+import os
+import sys
+import tempfile
+from datetime import date, time
+
+_tmp = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'counts.db')}"
+os.environ['USE_MONGO'] = 'false'
+os.environ['ARTIFACT_DIR'] = os.path.join(_tmp, 'artifacts')
+os.environ['ARTIFACT_PRERENDER'] = 'false'
+
+from sqlalchemy import event  # noqa: E402
+
+import app as A  # noqa: E402
+
+ENDPOINTS = ['/api/exams', '/api/attendances', '/api/allotted_students']
+SIZES = (5, 50)
+
+
+def seed(n_exams: int, per_exam: int = 10) -> None:
+    db = A.db
+    db.drop_all()
+    db.create_all()
+    halls = [A.Hall(name=f'H{i}', capacity=60, location='Block A') for i in range(n_exams)]
+    staff = [A.Staff(name=f'Staff {i}', email=f's{i}@x.edu', phone='9999999999', department='CS', role='Faculty')
+             for i in range(n_exams)]
+    db.session.add_all(halls + staff)
+    db.session.flush()
+    students = [A.Student(name=f'Student {i}', email=f'23CS{i:05d}@x.edu', phone='9999999999',
+                          department='CS', year='II') for i in range(n_exams * per_exam)]
+    db.session.add_all(students)
+    db.session.flush()
+    for e in range(n_exams):
+        exam = A.Exam(subject=f'CS{e:03d} - Paper {e}', date=date(2025, 11, 3), time=time(9, 30), duration=180,
+                      hall_id=halls[e].id, staff_id=staff[e].id, department='CS', year='II',
+                      status='ongoing' if e % 2 == 0 else 'upcoming')
+        db.session.add(exam)
+        db.session.flush()
+        for s in students[e * per_exam:(e + 1) * per_exam]:
+            db.session.add(A.Attendance(student_id=s.id, exam_id=exam.id, status='Absent', remarks=''))
+    db.session.commit()
+
+
+def expected(path: str):
+    # Reference output through the lazy ORM relationships
+    if path == '/api/exams':
+        return [e.to_dict() for e in A.Exam.query.all()]
+    if path == '/api/attendances':
+        return [a.to_dict() for a in A.Attendance.query.order_by(A.Attendance.id).all()]
+    out = []
+    for e in A.Exam.query.filter_by(status='ongoing').all():
+        d = e.to_dict()
+        d['attendances'] = [a.to_dict() for a in A.Attendance.query.filter_by(exam_id=e.id).order_by(A.Attendance.id)]
+        out.append(d)
+    return out
+
+
+def main() -> int:
+    client = A.app.test_client()
+    counts = {}
+    statements = [0]
+
+    def _count(*_args):
+        statements[0] += 1
+
+    ok = True
+    for n in SIZES:
+        with A.app.app_context():
+            seed(n)
+            A.db.session.remove()
+            event.listen(A.db.engine, 'before_cursor_execute', _count)
+            try:
+                for path in ENDPOINTS:
+                    statements[0] = 0
+                    resp = client.get(path)
+                    counts[(path, n)] = statements[0]
+                    if resp.status_code != 200:
+                        print(f"FAIL {path}: HTTP {resp.status_code}")
+                        ok = False
+                        continue
+                    with A.app.app_context():
+                        if resp.get_json() != expected(path):
+                            print(f"FAIL {path}: payload differs from to_dict() at {n} exams")
+                            ok = False
+            finally:
+                event.remove(A.db.engine, 'before_cursor_execute', _count)
+
+    print(f"{'endpoint':28}" + ''.join(f"{f'{n} exams':>12}" for n in SIZES))
+    for path in ENDPOINTS:
+        row = [counts[(path, n)] for n in SIZES]
+        print(f"{path:28}" + ''.join(f"{c:>12}" for c in row))
+        if len(set(row)) != 1:
+            print(f"FAIL {path}: query count grows with data")
+            ok = False
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+
+class AggregateCache:
+    """Process-local cache for a value computed by ``loader``.
+
+    Writes call :meth:`invalidate`; the next read recomputes. ``ttl`` bounds how
+    stale the value can get when a write happens in another process (or bypasses
+    the invalidation hooks), so reads are a memory lookup in the steady state.
+    """
+
+    def __init__(self, loader: Callable[[], Any], ttl: float = 60.0):
+        self.loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._expires = 0.0
+        self._generation = 0
+
+    def get(self) -> Any:
+        if time.monotonic() < self._expires:
+            return self._value
+        with self._lock:
+            # Another request may have refreshed while we waited for the lock
+            if time.monotonic() < self._expires:
+                return self._value
+            generation = self._generation
+            value = self.loader()
+            # Only publish if no write invalidated the cache while we were loading
+            if generation == self._generation:
+                self._value = value
+                self._expires = time.monotonic() + self.ttl
+            return value
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._expires = 0.0
+
+
+def invalidate_on_commit(touched, cache: AggregateCache, models: Iterable[type]) -> None:
+    """Invalidate ``cache`` once a transaction that wrote any of ``models`` commits.
+
+    ``touched`` is the session's ``TouchedModels``; Mongo writes bypass it and must
+    invalidate explicitly.
+    """
+    touched.subscribe(models, after_commit=lambda markers: cache.invalidate())
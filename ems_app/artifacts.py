@@ -0,0 +1,130 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import inspect
+
+# Bump when the ticket layout changes so old renders are never served again
+RENDER_VERSION = 1
+
+
+def artifact_key(kind: str, fields: Dict[str, Any]) -> str:
+    """sha256 over ``kind`` and ``fields``.
+
+    ``fields`` is every value that ends up on the rendered page, so any change to
+    what the page shows yields a new key and nothing else does.
+    """
+    blob = json.dumps([RENDER_VERSION, kind, fields], sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def artifact_slot(*parts: Any) -> str:
+    """Filename-safe name for one artifact of an owner, e.g. the ticket of a date and session."""
+    return re.sub(r'[^A-Za-z0-9_-]', '-', '_'.join(str(p) for p in parts))
+
+
+class ArtifactStore:
+    """Content-addressed file store on local disk: ``<root>/<owner>/<slot>.<key><suffix>``.
+
+    ``owner`` is the student id and ``slot`` names one artifact of that owner (see
+    ``artifact_slot``); storing a new key for a slot removes the older ones, so
+    each owner keeps one file per slot. Grouping by owner lets seat changes
+    reclaim the disk of the affected students with one directory removal. Keys
+    already change with the data, so a purge is housekeeping, not correctness.
+    """
+
+    def __init__(self, root: str, suffix: str = '.pdf'):
+        self.root = os.path.abspath(root)
+        self.suffix = suffix
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, owner: Any, slot: str, key: str) -> str:
+        return os.path.join(self.root, str(owner), f'{slot}.{key}{self.suffix}')
+
+    def get(self, owner: Any, slot: str, key: str) -> Optional[str]:
+        path = self.path(owner, slot, key)
+        return path if os.path.exists(path) else None
+
+    def read(self, owner: Any, slot: str, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(owner, slot, key), 'rb') as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, owner: Any, slot: str, key: str, data: bytes) -> str:
+        path = self.path(owner, slot, key)
+        for attempt in range(3):
+            try:
+                self._write(path, data)
+                break
+            except FileNotFoundError:
+                # A concurrent purge removed the owner directory mid-write: recreate it and retry
+                if attempt == 2:
+                    raise
+        self._evict(path, slot)
+        return path
+
+    def _evict(self, path: str, slot: str) -> None:
+        # Drop the renders this one supersedes: same slot, older key
+        folder = os.path.dirname(path)
+        try:
+            names = os.listdir(folder)
+        except FileNotFoundError:
+            return
+        prefix = slot + '.'
+        for name in names:
+            old = os.path.join(folder, name)
+            if name.startswith(prefix) and name.endswith(self.suffix) and old != path:
+                try:
+                    os.unlink(old)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> str:
+        # Write to a temp file in the same directory and rename, so readers never see a partial file
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return path
+
+    def purge(self, owners: Iterable[Any]) -> None:
+        for owner in owners:
+            shutil.rmtree(os.path.join(self.root, str(owner)), ignore_errors=True)
+
+
+def _previous_values(obj: Any, attr: str) -> Iterable[Any]:
+    try:
+        return inspect(obj).attrs[attr].history.deleted or ()
+    except Exception:
+        return ()
+
+
+def purge_on_commit(touched, store: ArtifactStore, models: Iterable[type], owner_attr: str = 'student_id') -> None:
+    """Drop stored artifacts of every owner whose ``models`` rows change, once the transaction commits.
+
+    ``touched`` is the session's ``TouchedModels``. A reassigned row also
+    invalidates its previous owner.
+    """
+    def _owners(sess, obj):
+        owners = {getattr(obj, owner_attr, None), *_previous_values(obj, owner_attr)}
+        owners.discard(None)
+        return owners
+
+    touched.subscribe(models, _owners, after_commit=store.purge)
@@ -3,12 +3,15 @@ import os
 from typing import List, Dict, Any, Tuple
 from datetime import datetime
 
-from flask import Blueprint, request, jsonify, current_app, Response
+from flask import Blueprint, request, jsonify, current_app, Response, send_file
 from werkzeug.utils import secure_filename
 import pandas as pd
 from pymongo import MongoClient
 from bson.objectid import ObjectId
 
+from ems_app.xlsx_stream import write_xlsx
+from ems_app.versioning import scope_key, make_etag, request_variant, not_modified, with_etag, bump_mongo, read_mongo_versions
+
 bp = Blueprint('allocation_v2', __name__, url_prefix='/api/v2')
 
 
@@ -58,6 +61,33 @@ def _parse_date(value: str) -> str:
         raise ValueError(f'Unrecognized date format: {value}')
 
 
+def _seat_cursor(db, iso_date: str, sess: str):
+    """hall_seats for a date/session in (hall, seat) order, read in batches."""
+    return (db.get_collection('hall_seats')
+            .find({'date': iso_date, 'session': sess}, {'_id': 0})
+            .sort([('hall_name', 1), ('seat_no', 1)])
+            .batch_size(1000))
+
+
+def _peek(cursor):
+    """Return (first_doc, iterator over all docs) without materialising the cursor."""
+    from itertools import chain
+    first = next(cursor, None)
+    return first, (chain([first], cursor) if first is not None else iter(()))
+
+
+def _joined(chunks, size: int):
+    """Join every ``size`` template fragments into one write, like Jinja's enable_buffering."""
+    buf: List[str] = []
+    for chunk in chunks:
+        buf.append(chunk)
+        if len(buf) >= size:
+            yield ''.join(buf)
+            buf.clear()
+    if buf:
+        yield ''.join(buf)
+
+
 @bp.route('/upload/halls', methods=['POST'])
 def upload_halls_v2():
     if 'file' not in request.files:
@@ -175,6 +205,8 @@ def allocate_v2():
         items_sorted = sorted(items, key=lambda x: (str(x.get('Reg_No', '')).zfill(20)))
         n = len(items_sorted)
         if n > total_capacity:
+            if created_slots:
+                bump_mongo(db, [scope_key(iso_date, sess)])
             return jsonify({'error': f'Not enough capacity to allocate {n} students for subject {sub_code} on {iso_date} {sess}',
                             'needed': n, 'capacity': total_capacity}), 400
 
@@ -234,6 +266,9 @@ def allocate_v2():
         })
         created_slots.append(slot_id)
 
+    # Invalidate cached exports of this date/session
+    bump_mongo(db, [scope_key(iso_date, sess)])
+
     return jsonify({
         'message': 'Allocation completed (Mongo)',
         'date': iso_date,
@@ -259,58 +294,57 @@ def export_hall_tickets_v2():
         return jsonify({'error': str(e)}), 400
 
     db = _get_mongo_db()
-    seats = list(db.get_collection('hall_seats').find(
-        {'date': iso_date, 'session': sess},
-        {'_id': 0}
-    ).sort([('hall_name', 1), ('seat_no', 1)]))
-    if not seats:
+    etag = make_etag(read_mongo_versions(db, [scope_key(iso_date, sess)]), request_variant())
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    first, seats = _peek(_seat_cursor(db, iso_date, sess))
+    if first is None:
         return jsonify({'error': 'No hall seats found for given date/session'}), 404
 
     if fmt == 'xlsx':
-        import pandas as pd
-        from io import BytesIO
-        buf = BytesIO()
-        df = pd.DataFrame(seats)
+        import tempfile
         # Arrange columns nicely
         cols = ['reg_no','student_name','dept','sub_code','sub_title','date','session','hall_name','seat_no']
-        df = df[[c for c in cols if c in df.columns]]
-        with pd.ExcelWriter(buf, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='HallTickets')
-        buf.seek(0)
+        rows = ([r.get(c, '') for c in cols] for r in seats)
+        fh = tempfile.TemporaryFile()
+        write_xlsx(fh, [('HallTickets', cols, rows)])
+        fh.seek(0)
         fname = f"halltickets_{iso_date}_{sess}.xlsx"
-        return Response(buf.getvalue(), mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                        headers={'Content-Disposition': f'attachment; filename={fname}'})
+        return with_etag(send_file(fh, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                                   as_attachment=True, download_name=fname), etag)
 
     if fmt == 'pdf':
         from io import BytesIO
         from reportlab.lib.pagesizes import A4
         from reportlab.pdfgen import canvas
         from reportlab.lib.units import mm
+        from ems_app.pdf_templates import place_form, V2_TICKET_VALUE_X
         buf = BytesIO()
         c = canvas.Canvas(buf, pagesize=A4)
         W, H = A4
         for r in seats:
-            c.setFont('Helvetica-Bold', 14)
-            c.drawString(20*mm, H-20*mm, 'HALL TICKET')
+            # Labels live in one shared form; each page only carries the values
+            place_form(c, 'HallTicketV2')
             c.setFont('Helvetica', 11)
             y = H-30*mm
-            lines = [
-                f"Name: {r.get('student_name','')}",
-                f"Reg No: {r.get('reg_no','')}",
-                f"Dept: {r.get('dept','')}",
-                f"Subject: {r.get('sub_code','')} - {r.get('sub_title','')}",
-                f"Date/Session: {r.get('date','')} {r.get('session','')}",
-                f"Hall/Seat: {r.get('hall_name','')} / {r.get('seat_no','')}",
+            values = [
+                f"{r.get('student_name','')}",
+                f"{r.get('reg_no','')}",
+                f"{r.get('dept','')}",
+                f"{r.get('sub_code','')} - {r.get('sub_title','')}",
+                f"{r.get('date','')} {r.get('session','')}",
+                f"{r.get('hall_name','')} / {r.get('seat_no','')}",
             ]
-            for line in lines:
-                c.drawString(20*mm, y, line)
+            for x, value in zip(V2_TICKET_VALUE_X, values):
+                c.drawString(x, y, value)
                 y -= 7*mm
             c.showPage()
         c.save()
         pdf_bytes = buf.getvalue()
         fname = f"halltickets_{iso_date}_{sess}.pdf"
-        return Response(pdf_bytes, mimetype='application/pdf',
-                        headers={'Content-Disposition': f'attachment; filename={fname}'})
+        return with_etag(Response(pdf_bytes, mimetype='application/pdf',
+                                  headers={'Content-Disposition': f'attachment; filename={fname}'}), etag)
 
     return jsonify({'error': 'Invalid format. Use xlsx or pdf'}), 400
 
@@ -331,48 +365,38 @@ def export_attendance_v2():
         return jsonify({'error': str(e)}), 400
 
     db = _get_mongo_db()
-    seats = list(db.get_collection('hall_seats').find(
-        {'date': iso_date, 'session': sess},
-        {'_id': 0}
-    ).sort([('hall_name', 1), ('seat_no', 1)]))
-    if not seats:
+    etag = make_etag(read_mongo_versions(db, [scope_key(iso_date, sess)]), request_variant())
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    first, seats = _peek(_seat_cursor(db, iso_date, sess))
+    if first is None:
         return jsonify({'error': 'No hall seats found for given date/session'}), 404
 
-    # Prepare grouped by hall
-    from collections import defaultdict
-    halls = defaultdict(list)
-    for r in seats:
-        halls[r.get('hall_name','')].append(r)
-
     if fmt == 'xlsx':
-        import pandas as pd
-        from io import BytesIO
-        buf = BytesIO()
-        with pd.ExcelWriter(buf, engine='openpyxl') as writer:
-            for hall_name, rows in halls.items():
-                df = pd.DataFrame(rows)
-                df = df[['seat_no','reg_no','student_name','sub_code','sub_title']]
-                df.rename(columns={'seat_no': 'S.No', 'student_name': 'Name of the Student', 'sub_code': 'Subject', 'sub_title': 'Subject Title'}, inplace=True)
-                df.to_excel(writer, index=False, sheet_name=(hall_name or 'Hall')[:31])
-        buf.seek(0)
+        import tempfile
+        from itertools import groupby
+        # Cursor is sorted by hall, so each group becomes one sheet written row by row
+        header = ['S.No', 'reg_no', 'Name of the Student', 'Subject', 'Subject Title']
+        sheets = (
+            (hall_name or 'Hall', header,
+             ([r.get('seat_no', ''), r.get('reg_no', ''), r.get('student_name', ''), r.get('sub_code', ''), r.get('sub_title', '')]
+              for r in rows))
+            for hall_name, rows in groupby(seats, key=lambda r: r.get('hall_name', ''))
+        )
+        fh = tempfile.TemporaryFile()
+        write_xlsx(fh, sheets)
+        fh.seek(0)
         fname = f"attendance_{iso_date}_{sess}.xlsx"
-        return Response(buf.getvalue(), mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                        headers={'Content-Disposition': f'attachment; filename={fname}'})
+        return with_etag(send_file(fh, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                                   as_attachment=True, download_name=fname), etag)
 
     if fmt == 'html':
-        # Simple printable HTML
-        html_parts = ["<html><head><title>Attendance</title></head><body>"]
-        html_parts.append(f"<h2>Attendance {iso_date} {sess}</h2>")
-        for hall_name, rows in halls.items():
-            html_parts.append(f"<h3>Hall: {hall_name}</h3>")
-            html_parts.append('<table border="1" cellspacing="0" cellpadding="5">')
-            html_parts.append('<thead><tr><th>S.No</th><th>Reg_No</th><th>Name of the Student</th><th>Subject</th><th>Signature</th></tr></thead><tbody>')
-            for r in rows:
-                html_parts.append(
-                    f"<tr><td>{r.get('seat_no','')}</td><td>{r.get('reg_no','')}</td><td>{r.get('student_name','')}</td><td>{r.get('sub_code','')}</td><td></td></tr>"
-                )
-            html_parts.append('</tbody></table><br>')
-        html_parts.append("</body></html>")
-        return Response("\n".join(html_parts), mimetype='text/html')
+        from itertools import groupby
+        from flask import stream_template
+        # Printable HTML streamed hall by hall straight from the cursor; Jinja autoescapes values
+        halls = groupby(seats, key=lambda r: r.get('hall_name', ''))
+        stream = stream_template('attendance_export.html', iso_date=iso_date, session_code=sess, halls=halls)
+        return with_etag(Response(_joined(stream, 64), mimetype='text/html'), etag)
 
     return jsonify({'error': 'Invalid format. Use xlsx or html'}), 400
@@ -1,12 +1,20 @@
 from __future__ import annotations
+import base64
+import binascii
 import os
 import json
+from datetime import datetime
 from typing import List, Dict, Any
 
-from flask import Blueprint, request, jsonify, current_app, session
+from flask import Blueprint, request, jsonify, current_app, session, Response, stream_with_context
 from werkzeug.utils import secure_filename
 import pandas as pd
-from pymongo import MongoClient
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, MongoClient
+
+from ems_app.clashes import find_clashes
+from ems_app.sheet_cache import SHEET_COLUMNS, sheet_path, subject_summary, write_sheet
 
 bp = Blueprint('students_v2', __name__, url_prefix='/api/v2')
 
@@ -49,10 +57,7 @@ def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def _build_16col_view(df: pd.DataFrame) -> pd.DataFrame:
-    desired = [
-        'SNO','ENQ','Reg_No','Name of the Student','Prog & Year','CLASS CODE','year','Degree','Dept',
-        'DEPT ORD','CLASS ORD','SUB ORD','SUB_CODE','SUB_TITLE','DATE','SESS'
-    ]
+    desired = SHEET_COLUMNS
     cols_lower = {c.lower(): c for c in df.columns}
 
     def get_src(name: str):
@@ -75,11 +80,80 @@ def _build_16col_view(df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame(data, columns=desired).fillna("")
 
 
+RAW_PAGE_MAX = 1000
+# Keyset order of students_raw pages; every filter below has a compound index in ems_app/indexes.py
+# ending in these keys, so a filtered page is an index range walk (no sort stage)
+RAW_ORDER = [('DATE', ASCENDING), ('SESS', ASCENDING), ('Reg_No', ASCENDING), ('_id', ASCENDING)]
+
+
+def _date_values(value: str) -> List[str]:
+    # Sheets keep dates as typed; match the input plus its ISO and DD-MM-YYYY spellings
+    value = value.strip()
+    out = [value]
+    for fmt in ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y'):
+        try:
+            d = datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+        out += [d.isoformat(), d.strftime('%d-%m-%Y')]
+        break
+    return list(dict.fromkeys(out))
+
+
+def _encode_cursor(doc: Dict[str, Any]) -> str:
+    key = [doc.get('DATE'), doc.get('SESS'), doc.get('Reg_No'), str(doc['_id'])]
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(token: str) -> Dict[str, Any]:
+    """``$or`` clause selecting rows strictly after the cursor in RAW_ORDER."""
+    date, sess, reg, oid = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    oid = ObjectId(oid)
+    return {'$or': [
+        {'DATE': {'$gt': date}},
+        {'DATE': date, 'SESS': {'$gt': sess}},
+        {'DATE': date, 'SESS': sess, 'Reg_No': {'$gt': reg}},
+        {'DATE': date, 'SESS': sess, 'Reg_No': reg, '_id': {'$gt': oid}},
+    ]}
+
+
+def _raw_filter(args) -> Dict[str, Any]:
+    match: Dict[str, Any] = {}
+    if args.get('date'):
+        dates = _date_values(args['date'])
+        match['DATE'] = dates[0] if len(dates) == 1 else {'$in': dates}
+    if args.get('session'):
+        match['SESS'] = args['session'].strip().upper()
+    if args.get('sub_code'):
+        match['SUB_CODE'] = args['sub_code'].strip()
+    if args.get('dept'):
+        match['Dept'] = args['dept'].strip()
+    return match
+
+
+def _wants_ndjson() -> bool:
+    if request.args.get('format', '').lower() == 'ndjson':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    return best == 'application/x-ndjson'
+
+
 @bp.route('/students', methods=['GET'])
 def list_students_v2():
-    """Return uploaded 16-column rows from JSON cache or Mongo fallback."""
+    """Uploaded 16-column rows.
+
+    Query: ?date&session&sub_code&dept filter students_raw; ?limit&cursor page it
+    as {rows, limit, next_cursor}. ``format=ndjson`` (or Accept: application/x-ndjson)
+    streams every matching row, one JSON document per line, straight from the cursor.
+    Without any of these the whole JSON cache (or students_raw) is returned as before.
+    """
+    filtered = any(request.args.get(k) for k in ('date', 'session', 'sub_code', 'dept', 'limit', 'cursor'))
+    ndjson = _wants_ndjson()
+    if filtered or ndjson:
+        return _query_students_raw(ndjson)
+
     folder = _ensure_uploads_dir()
-    json_path = os.path.join(folder, 'last_students.json')
+    json_path = sheet_path(folder)
     rows: List[Dict[str, Any]] = []
     try:
         if os.path.exists(json_path):
@@ -99,6 +173,40 @@ def list_students_v2():
     return jsonify(rows)
 
 
+def _query_students_raw(ndjson: bool):
+    match = _raw_filter(request.args)
+    try:
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+        if limit is not None and limit < 1:
+            raise ValueError
+        if request.args.get('cursor'):
+            match = {'$and': [match, _decode_cursor(request.args['cursor'])]} if match else _decode_cursor(request.args['cursor'])
+    except (ValueError, TypeError, binascii.Error, InvalidId):
+        return jsonify({'error': 'limit must be a positive integer and cursor a value returned by this endpoint'}), 400
+
+    coll = _get_mongo_db().get_collection('students_raw')
+    cursor = coll.find(match).sort(RAW_ORDER)
+
+    if ndjson:
+        if limit is not None:
+            cursor = cursor.limit(limit)
+
+        def generate():
+            for doc in cursor.batch_size(1000):
+                doc.pop('_id', None)
+                yield json.dumps(doc, ensure_ascii=False, default=str) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    limit = min(limit or 100, RAW_PAGE_MAX)
+    docs = list(cursor.limit(limit + 1))
+    next_cursor = _encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    rows = []
+    for doc in docs[:limit]:
+        doc.pop('_id', None)
+        rows.append(doc)
+    return jsonify({'rows': rows, 'limit': limit, 'next_cursor': next_cursor})
+
+
 @bp.route('/upload/timetable', methods=['POST'])
 def upload_timetable_v2():
     """Mongo-first upload: store raw rows and return subject grouping summary."""
@@ -122,10 +230,9 @@ def upload_timetable_v2():
 
         display_df = _build_16col_view(df)
 
-        # Save JSON cache for UI
-        json_path = os.path.join(folder, 'last_students.json')
-        display_df.to_json(json_path, orient='records', force_ascii=False)
-        session['last_students_json'] = json_path
+        # Save JSON cache (rows + precomputed summary) for the Students page
+        summary = subject_summary(display_df)
+        session['last_students_json'] = write_sheet(display_df, folder, subjects=summary)
 
         # Store raw docs to Mongo
         db = _get_mongo_db()
@@ -134,22 +241,16 @@ def upload_timetable_v2():
             db.get_collection('students_raw').delete_many({})
             db.get_collection('students_raw').insert_many(docs)
 
-        # Subject grouping summary
-        subj_key = ['SUB_CODE', 'SUB_TITLE', 'DATE', 'SESS']
-        summary_map: Dict[tuple, int] = {}
-        for r in docs:
-            key = tuple(r.get(k, '') for k in subj_key)
-            summary_map[key] = summary_map.get(key, 0) + 1
-        summary = [
-            {
-                'SUB_CODE': k[0], 'SUB_TITLE': k[1], 'DATE': k[2], 'SESS': k[3], 'TOTAL': v
-            } for k, v in sorted(summary_map.items(), key=lambda x: (x[0][2], x[0][3], x[0][0]))
-        ]
+        clashes = find_clashes(
+            (r.get('Reg_No', ''), r.get('DATE', ''), r.get('SESS', ''), r.get('SUB_CODE', '')) for r in docs
+        )
 
         return jsonify({
             'message': 'Timetable uploaded (Mongo-first)',
             'rows': len(docs),
-            'summary': summary
+            'summary': summary,
+            'clash_count': len(clashes),
+            'clashes': clashes
         })
     except Exception as e:
         return jsonify({'error': f'Failed to process file: {e}'}), 500
@@ -159,3 +260,39 @@ def upload_timetable_v2():
                 os.remove(path)
         except Exception:
             pass
+
+
+@bp.route('/clashes', methods=['GET'])
+def list_clashes_v2():
+    """Students with more than one subject in the same DATE+SESS of students_raw.
+    Query: ?date=...&session=FN|AN (both optional)
+    """
+    match: Dict[str, Any] = {}
+    if request.args.get('date'):
+        match['DATE'] = request.args['date'].strip()
+    if request.args.get('session'):
+        match['SESS'] = request.args['session'].strip().upper()
+
+    db = _get_mongo_db()
+    pipeline: List[Dict[str, Any]] = []
+    if match:
+        pipeline.append({'$match': match})
+    # $group is blocking: it holds one entry per (Reg_No, DATE, SESS) until the input ends,
+    # spilling to disk via allowDiskUse. The $match and $sort are both served by the
+    # (DATE, SESS, Reg_No) index, so the input is an index scan without a sort stage.
+    pipeline += [
+        {'$sort': {'DATE': 1, 'SESS': 1, 'Reg_No': 1}},
+        {'$group': {
+            '_id': {'reg_no': '$Reg_No', 'date': '$DATE', 'session': '$SESS'},
+            'subjects': {'$addToSet': '$SUB_CODE'},
+        }},
+        {'$match': {'subjects.1': {'$exists': True}}},
+    ]
+    try:
+        clashes = [
+            {**doc['_id'], 'subjects': sorted(doc['subjects'])}
+            for doc in db.get_collection('students_raw').aggregate(pipeline, allowDiskUse=True)
+        ]
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch clashes: {e}'}), 500
+    return jsonify({'clash_count': len(clashes), 'clashes': clashes})
@@ -0,0 +1,36 @@
+from __future__ import annotations
+from typing import List, Dict, Any, Tuple, Iterable
+
+
+def find_clashes(rows: Iterable[Tuple[Any, Any, Any, Any]]) -> List[Dict[str, Any]]:
+    """Find students registered for more than one subject in the same (date, session).
+
+    ``rows`` yields (reg_no, date, session, subject_code). A single pass builds a hash
+    index keyed on (reg_no, date, session); a key is reported once its second distinct
+    subject shows up, so the whole scan is O(n).
+    """
+    index: Dict[Tuple[str, Any, str], List[str]] = {}
+    clashing: List[Tuple[str, Any, str]] = []
+    for reg_no, date, sess, subject in rows:
+        reg = str(reg_no or '').strip()
+        if not reg:
+            continue
+        key = (reg, date, str(sess or '').strip().upper())
+        code = str(subject or '').strip()
+        subjects = index.get(key)
+        if subjects is None:
+            index[key] = [code]
+        elif code not in subjects:
+            subjects.append(code)
+            if len(subjects) == 2:
+                clashing.append(key)
+
+    return [
+        {
+            'reg_no': reg,
+            'date': date.isoformat() if hasattr(date, 'isoformat') else str(date),
+            'session': sess,
+            'subjects': index[(reg, date, sess)],
+        }
+        for reg, date, sess in clashing
+    ]
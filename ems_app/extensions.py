@@ -1,6 +1,8 @@
 from typing import Optional
 from flask import Flask
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient
+
+from ems_app.indexes import ensure_indexes
 
 mongo_client: Optional[MongoClient] = None
 mongo_db = None
@@ -12,11 +14,9 @@ def init_mongo(app: Flask) -> None:
     db_name = app.config.get('MONGO_DB_NAME', 'exam_management')
     mongo_client = MongoClient(uri)
     mongo_db = mongo_client[db_name]
-    # Common indexes
+    # Indexes declared in ems_app.indexes; an unreachable server must not fail startup
     try:
-        mongo_db.students.create_index([('reg_no', ASCENDING)], name='idx_students_regno', unique=False)
-        mongo_db.subjects.create_index([('code', ASCENDING)], name='idx_subjects_code', unique=False)
-        mongo_db.exam_slots.create_index([('date', ASCENDING), ('session', ASCENDING), ('subject_id', ASCENDING)], name='idx_slots_date_sess_sub')
+        ensure_indexes(mongo_db)
     except Exception:
         pass
     # Attach to app for convenience
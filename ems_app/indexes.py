@@ -0,0 +1,93 @@
+from __future__ import annotations
+import logging
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+log = logging.getLogger(__name__)
+
+# Every Mongo index the app relies on, per collection. ``ensure_indexes`` applies
+# this at startup; benchmarks/check_mongo_indexes.py explains the hot query shapes
+# against it. Add the index here when adding a query, never ad hoc at the call site.
+
+# (DATE, SESS, Reg_No, _id): allocate_v2's {DATE, SESS} lookup, the clash
+# pipeline's sort and the /api/v2/students keyset order
+_RAW_ORDER = [('DATE', ASCENDING), ('SESS', ASCENDING), ('Reg_No', ASCENDING), ('_id', ASCENDING)]
+
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    'students': [
+        # Names match the ones create_index generated before the registry existed
+        {'name': 'email_1', 'keys': [('email', ASCENDING)], 'unique': True},
+        {'name': 'id_1', 'keys': [('id', ASCENDING)]},
+        {'name': 'department_1_year_1_id_1', 'keys': [('department', ASCENDING), ('year', ASCENDING), ('id', ASCENDING)]},
+        # /api/students?year= pages, like ix_student_year_id on the SQL side
+        {'name': 'idx_students_year_id', 'keys': [('year', ASCENDING), ('id', ASCENDING)]},
+        # ... and ?department= pages without a year, like ix_student_department_id
+        {'name': 'idx_students_dept_id', 'keys': [('department', ASCENDING), ('id', ASCENDING)]},
+        {'name': 'idx_students_regno', 'keys': [('reg_no', ASCENDING)]},
+    ],
+    'subjects': [
+        {'name': 'idx_subjects_code', 'keys': [('code', ASCENDING)]},
+    ],
+    'exam_slots': [
+        {'name': 'idx_slots_date_sess_subcode',
+         'keys': [('date', ASCENDING), ('session', ASCENDING), ('subject_code', ASCENDING)]},
+    ],
+    'students_raw': [
+        {'name': 'idx_raw_date_sess_regno_id', 'keys': _RAW_ORDER},
+        {'name': 'idx_raw_subcode_order', 'keys': [('SUB_CODE', ASCENDING)] + _RAW_ORDER},
+        {'name': 'idx_raw_dept_order', 'keys': [('Dept', ASCENDING)] + _RAW_ORDER},
+    ],
+    'hall_seats': [
+        # Both v2 exports: {date, session} in (hall_name, seat_no) order
+        {'name': 'idx_seats_date_sess_hall_seat',
+         'keys': [('date', ASCENDING), ('session', ASCENDING), ('hall_name', ASCENDING), ('seat_no', ASCENDING)]},
+    ],
+    'halls': [
+        # allocate_v2 fills the largest halls first
+        {'name': 'idx_halls_capacity', 'keys': [('capacity', DESCENDING)]},
+    ],
+}
+
+# Indexes earlier releases created that the registry replaces
+OBSOLETE: Dict[str, List[str]] = {
+    'students_raw': ['idx_raw_date_sess_regno'],      # prefix of idx_raw_date_sess_regno_id
+    'exam_slots': ['idx_slots_date_sess_sub'],        # keyed on subject_id, which v2 slots never store
+}
+
+
+def _options(spec: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in spec.items() if k not in ('name', 'keys')}
+
+
+def ensure_indexes(db, registry: Dict[str, List[Dict[str, Any]]] = INDEXES,
+                   obsolete: Dict[str, List[str]] = OBSOLETE) -> List[Tuple[str, str]]:
+    """Create missing registry indexes and drop obsolete ones; returns (collection, name) created.
+
+    Idempotent: an index whose key pattern already exists (under any name) is left
+    alone, so repeated startups issue only ``index_information`` reads.
+    """
+    created: List[Tuple[str, str]] = []
+    for coll_name, specs in registry.items():
+        coll = db.get_collection(coll_name)
+        existing = coll.index_information()
+        for name in obsolete.get(coll_name, ()):
+            if name in existing:
+                coll.drop_index(name)
+                existing.pop(name)
+        by_keys = {tuple(tuple(k) for k in info['key']): name for name, info in existing.items()}
+        for spec in specs:
+            keys = tuple(tuple(k) for k in spec['keys'])
+            if keys in by_keys:
+                if by_keys[keys] != spec['name']:
+                    log.info('index %s.%s exists as %s', coll_name, spec['name'], by_keys[keys])
+                continue
+            try:
+                coll.create_index(list(spec['keys']), name=spec['name'], **_options(spec))
+            except OperationFailure as e:
+                # e.g. a unique index over data that already has duplicates: report, keep starting up
+                log.warning('could not create index %s.%s: %s', coll_name, spec['name'], e)
+                continue
+            created.append((coll_name, spec['name']))
+    return created
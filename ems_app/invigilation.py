@@ -0,0 +1,146 @@
+from __future__ import annotations
+import time
+from collections import defaultdict
+from typing import List, Dict, Any, Tuple, Iterable, Optional
+
+# Order of sessions within a day; used to detect back-to-back duties
+SESSION_ORDER = {'FN': 0, 'AN': 1, 'EV': 2}
+
+
+def _session_sort_key(key: Tuple[Any, str]) -> Tuple[Any, int, str]:
+    date, sess = key
+    return (date, SESSION_ORDER.get(str(sess).upper(), 99), str(sess))
+
+
+def build_hall_duties(rows: Iterable[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+    """Collapse (exam_slot_id, date, session, hall_id, department, seats) rows into
+    one duty per (date, session, hall).
+
+    A hall can host several subjects in the same session; the duty keeps every
+    exam_slot_id seated there plus the set of departments those subjects belong to.
+    """
+    duties: Dict[Tuple[Any, str, int], Dict[str, Any]] = {}
+    for slot_id, date, sess, hall_id, dept, seats in rows:
+        key = (date, str(sess).upper(), hall_id)
+        duty = duties.get(key)
+        if duty is None:
+            duty = {
+                'date': date,
+                'session': key[1],
+                'hall_id': hall_id,
+                'occupancy': 0,
+                'departments': set(),
+                'slot_ids': [],
+            }
+            duties[key] = duty
+        duty['occupancy'] += int(seats or 0)
+        if dept:
+            duty['departments'].add(str(dept).strip().upper())
+        if slot_id not in duty['slot_ids']:
+            duty['slot_ids'].append(slot_id)
+    return list(duties.values())
+
+
+def assign_invigilators(
+    duties: List[Dict[str, Any]],
+    faculty: List[Tuple[int, Optional[str]]],
+    max_duties: int = 6,
+    two_above: int = 30,
+    time_budget: float = 10.0,
+) -> Dict[str, Any]:
+    """Greedy, load-balanced invigilator assignment.
+
+    - Every occupied hall gets one invigilator, two when occupancy exceeds ``two_above``.
+    - A faculty member never exceeds ``max_duties`` duties in total.
+    - A faculty member is never placed in consecutive sessions of the same day.
+    - A faculty member never invigilates a hall writing a subject of their own department.
+    - Within each session the least-loaded eligible faculty are picked first.
+
+    Sessions are processed in chronological order. If ``time_budget`` seconds elapse,
+    the remaining halls are returned as unfilled instead of blocking the caller.
+    """
+    started = time.perf_counter()
+    deadline = started + max(float(time_budget), 0.0)
+
+    fac_ids = [int(fid) for fid, _ in faculty]
+    fac_dept = [str(d or '').strip().upper() for _, d in faculty]
+    load = [0] * len(fac_ids)
+
+    by_session: Dict[Tuple[Any, str], List[Dict[str, Any]]] = defaultdict(list)
+    for duty in duties:
+        if duty.get('occupancy', 0) > 0:
+            by_session[(duty['date'], duty['session'])].append(duty)
+
+    assignments: List[Dict[str, Any]] = []
+    unfilled: List[Dict[str, Any]] = []
+    timed_out = False
+
+    prev_key: Optional[Tuple[Any, str]] = None
+    prev_assigned: set = set()
+
+    for key in sorted(by_session.keys(), key=_session_sort_key):
+        halls = by_session[key]
+        # Bigger halls first so two-invigilator halls are not starved
+        halls.sort(key=lambda d: -d['occupancy'])
+
+        if timed_out or time.perf_counter() > deadline:
+            timed_out = True
+            unfilled.extend({'date': d['date'], 'session': d['session'], 'hall_id': d['hall_id'],
+                             'missing': 2 if d['occupancy'] > two_above else 1} for d in halls)
+            continue
+
+        back_to_back = prev_key is not None and prev_key[0] == key[0]
+        blocked = prev_assigned if back_to_back else set()
+
+        # Eligible pool for this session, least loaded first (index keeps it stable)
+        pool = [i for i in range(len(fac_ids)) if load[i] < max_duties and i not in blocked]
+        pool.sort(key=lambda i: (load[i], i))
+        used = bytearray(len(pool))
+        start = 0
+        assigned_now: set = set()
+
+        for duty in halls:
+            if time.perf_counter() > deadline:
+                timed_out = True
+            need = 2 if duty['occupancy'] > two_above else 1
+            if timed_out:
+                unfilled.append({'date': duty['date'], 'session': duty['session'],
+                                 'hall_id': duty['hall_id'], 'missing': need})
+                continue
+            depts = duty['departments']
+            picked = 0
+            i = start
+            while picked < need and i < len(pool):
+                if not used[i] and fac_dept[pool[i]] not in depts:
+                    used[i] = 1
+                    idx = pool[i]
+                    load[idx] += 1
+                    assigned_now.add(idx)
+                    assignments.append({
+                        'date': duty['date'],
+                        'session': duty['session'],
+                        'hall_id': duty['hall_id'],
+                        'slot_ids': list(duty['slot_ids']),
+                        'faculty_id': fac_ids[idx],
+                    })
+                    picked += 1
+                i += 1
+            while start < len(pool) and used[start]:
+                start += 1
+            if picked < need:
+                unfilled.append({'date': duty['date'], 'session': duty['session'],
+                                 'hall_id': duty['hall_id'], 'missing': need - picked})
+
+        prev_key = key
+        prev_assigned = assigned_now
+
+    loads = [n for n in load if n]
+    return {
+        'assignments': assignments,
+        'unfilled': unfilled,
+        'timed_out': timed_out,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        'faculty_used': len(loads),
+        'max_load': max(loads) if loads else 0,
+        'min_load': min(loads) if loads else 0,
+    }
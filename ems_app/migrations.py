@@ -0,0 +1,210 @@
+from __future__ import annotations
+import logging
+import re
+from datetime import datetime
+from typing import Callable, List, Sequence, Set, Tuple
+
+from sqlalchemy import (Column, DateTime, Integer, MetaData, String, Table, bindparam, inspect, insert, select,
+                        text, update)
+from pymongo import UpdateOne
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+log = logging.getLogger(__name__)
+
+# Versioned schema changes for databases that predate a model change.
+# ``db.create_all()`` only creates missing tables; it never adds an index or a
+# column to a table that already exists. Each migration below is idempotent (it
+# checks the live schema first), so it is safe on a fresh database whose tables
+# create_all just built from the current models, and when two workers start at once.
+# The models declare the same indexes, so both paths end with one schema.
+
+_meta = MetaData()
+schema_version = Table(
+    'schema_version', _meta,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+# --- helpers -----------------------------------------------------------------
+
+def _index_columns(connection, table: str):
+    insp = inspect(connection)
+    found = {}
+    for ix in insp.get_indexes(table):
+        found[ix['name']] = tuple(ix['column_names'])
+    for uq in insp.get_unique_constraints(table):
+        found[uq['name']] = tuple(uq['column_names'])
+    return found
+
+
+def _quote(connection, name: str) -> str:
+    return connection.dialect.identifier_preparer.quote(name)
+
+
+def create_index(connection, table: str, name: str, columns: Sequence[str], unique: bool = False) -> bool:
+    """CREATE INDEX unless an index of that name or over exactly those columns exists."""
+    if not inspect(connection).has_table(table):
+        return False
+    existing = _index_columns(connection, table)
+    if name in existing or tuple(columns) in existing.values():
+        return False
+    cols = ', '.join(_quote(connection, c) for c in columns)
+    stmt = f"CREATE {'UNIQUE ' if unique else ''}INDEX {_quote(connection, name)} ON {_quote(connection, table)} ({cols})"
+    try:
+        connection.execute(text(stmt))
+    except DBAPIError:
+        # Another worker may have created it between the check and the DDL
+        if name not in _index_columns(connection, table):
+            raise
+        return False
+    return True
+
+
+def add_column(connection, table: str, name: str, ddl_type: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN unless the column exists. ``ddl_type`` is portable DDL, e.g. VARCHAR(20)."""
+    insp = inspect(connection)
+    if not insp.has_table(table) or name in {c['name'] for c in insp.get_columns(table)}:
+        return False
+    connection.execute(text(f"ALTER TABLE {_quote(connection, table)} ADD COLUMN {_quote(connection, name)} {ddl_type}"))
+    return True
+
+
+# --- migrations ----------------------------------------------------------------
+
+def _m1_hot_path_indexes(connection) -> None:
+    for table, name, columns in HOT_PATH_INDEXES:
+        create_index(connection, table, name, columns)
+
+
+# (table, index name, columns). Single-column FK lookups plus the composites the
+# hot queries filter and order by; see benchmarks/bench_sql_indexes.py.
+HOT_PATH_INDEXES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    # hall tickets / attendance sheets / hall_ticket: Exam.date == d AND Exam.time == t
+    ('exam', 'ix_exam_date_time', ('date', 'time')),
+    # /api/allotted_students: status = 'ongoing' paged by id
+    ('exam', 'ix_exam_status_id', ('status', 'id')),
+    # per-exam attendance lists and the allotted join
+    ('attendance', 'ix_attendance_exam', ('exam_id',)),
+    # per-student ticket: student_id = ? joined to exam; also serves student_id lookups
+    ('attendance', 'ix_attendance_student_exam', ('student_id', 'exam_id')),
+    # per-student seat lookups (ticket PDF, delete_student) with the slot join covered
+    ('hall_seat', 'ix_hall_seat_student_slot', ('student_id', 'exam_slot_id')),
+    ('hall_seat', 'ix_hall_seat_hall', ('hall_id',)),
+    ('exam_slot', 'ix_exam_slot_date_session', ('date', 'session')),
+    # Declared on the models earlier but never added to existing tables by create_all
+    ('student', 'ix_student_department_year_id', ('department', 'year', 'id')),
+    ('student', 'ix_student_year_id', ('year', 'id')),
+    ('student_subject', 'ix_student_subject_subject', ('subject_id',)),
+]
+
+# Importers stored register numbers only as the local part of this pseudo-email domain
+PSEUDO_EMAIL_DOMAIN = 'example.edu'
+
+
+def reg_no_from_email(email: str):
+    """The register number a pseudo-email carries, or None for a real address."""
+    suffix = '@' + PSEUDO_EMAIL_DOMAIN
+    if email and email.endswith(suffix) and 0 < len(email) - len(suffix) <= 30:
+        return email[:-len(suffix)]
+    return None
+
+
+def _m2_student_reg_no(connection) -> None:
+    add_column(connection, 'student', 'reg_no', 'VARCHAR(30)')
+    # Backfill in id order and in batches; only pseudo-emails carry a register number
+    student = Table('student', MetaData(), autoload_with=connection)
+    suffix = '@' + PSEUDO_EMAIL_DOMAIN
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(student.c.id, student.c.email)
+            .where(student.c.id > last_id, student.c.reg_no.is_(None), student.c.email.like('%' + suffix))
+            .order_by(student.c.id).limit(5000)).all()
+        if not rows:
+            break
+        params = [{'sid': sid, 'reg': reg_no_from_email(email)} for sid, email in rows
+                  if reg_no_from_email(email)]
+        if params:
+            connection.execute(
+                update(student).where(student.c.id == bindparam('sid')).values(reg_no=bindparam('reg')), params)
+        last_id = rows[-1][0]
+    create_index(connection, 'student', 'ux_student_reg_no', ('reg_no',), unique=True)
+
+
+def _m3_student_department_id(connection) -> None:
+    # /api/students?department= without a year: equality on department, keyset on id
+    create_index(connection, 'student', 'ix_student_department_id', ('department', 'id'))
+
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, 'hot-path indexes', _m1_hot_path_indexes),
+    (2, 'student.reg_no', _m2_student_reg_no),
+    (3, 'student department/id index', _m3_student_department_id),
+]
+
+
+# --- runner ------------------------------------------------------------------------
+
+def applied_versions(connection) -> Set[int]:
+    if not inspect(connection).has_table('schema_version'):
+        return set()
+    return set(connection.execute(select(schema_version.c.version)).scalars())
+
+
+def current_version(connection) -> int:
+    return max(applied_versions(connection), default=0)
+
+
+def migrate(engine, migrations: Sequence[Tuple[int, str, Callable]] = MIGRATIONS) -> List[int]:
+    """Apply every migration not yet recorded in schema_version, in order; returns the versions applied.
+
+    Each migration and its schema_version row share a transaction. MySQL commits
+    DDL implicitly, which is why migrations check the live schema rather than
+    relying on a rollback.
+    """
+    _meta.create_all(engine, checkfirst=True)
+    applied = []
+    for version, name, upgrade in sorted(migrations, key=lambda m: m[0]):
+        try:
+            with engine.begin() as connection:
+                if version in applied_versions(connection):
+                    continue
+                upgrade(connection)
+                connection.execute(insert(schema_version).values(version=version, name=name,
+                                                                 applied_at=datetime.utcnow()))
+        except IntegrityError:
+            # A concurrent worker recorded it first
+            continue
+        log.info('applied schema migration %s: %s', version, name)
+        applied.append(version)
+    return applied
+
+
+# --- Mongo -------------------------------------------------------------------------
+
+def backfill_mongo_reg_no(db) -> int:
+    """Migration 2 for the Mongo students collection: set reg_no from pseudo-emails.
+
+    Runs once; a marker in the ``schema_version`` collection makes later startups a
+    single lookup. Returns the number of documents updated.
+    """
+    versions = db.get_collection('schema_version')
+    if versions.find_one({'_id': 'students.reg_no'}) is not None:
+        return 0
+    suffix = '@' + PSEUDO_EMAIL_DOMAIN
+    students = db.get_collection('students')
+    cursor = students.find({'reg_no': None, 'email': {'$regex': '^.{1,30}' + re.escape(suffix) + '$'}},
+                           {'email': 1}).batch_size(5000)
+    updated, ops = 0, []
+    for doc in cursor:
+        ops.append(UpdateOne({'_id': doc['_id'], 'reg_no': None}, {'$set': {'reg_no': reg_no_from_email(doc['email'])}}))
+        if len(ops) >= 5000:
+            updated += students.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += students.bulk_write(ops, ordered=False).modified_count
+    versions.update_one({'_id': 'students.reg_no'}, {'$set': {'applied_at': datetime.utcnow()}}, upsert=True)
+    log.info('backfilled reg_no on %s Mongo students', updated)
+    return updated
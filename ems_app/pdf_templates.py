@@ -0,0 +1,86 @@
+from __future__ import annotations
+from typing import Callable, Dict
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# Static page layouts drawn once per document as Form XObjects and stamped on each
+# page with doForm; callers only draw the per-student values. A form only pays off
+# when a document has many pages: one-page documents draw the layout inline.
+
+W, H = A4
+
+
+def _after(label: str, font: str = 'Helvetica', size: float = 10, x: float = 20*mm) -> float:
+    # x where a value starts when it follows its label, e.g. "Name: " + value
+    return x + stringWidth(label, font, size)
+
+
+TICKET_VALUE_X = {
+    'name': _after('Name: '),
+    'reg': _after('Reg No: '),
+    'department': _after('Department: '),
+    'date': _after('Date: '),
+}
+
+V2_TICKET_LABELS = ['Name: ', 'Reg No: ', 'Dept: ', 'Subject: ', 'Date/Session: ', 'Hall/Seat: ']
+V2_TICKET_VALUE_X = [_after(label, size=11) for label in V2_TICKET_LABELS]
+
+
+def _hall_ticket(c) -> None:
+    c.setFont('Helvetica-Bold', 14)
+    c.drawString(20*mm, (H-20*mm), 'HALL TICKET')
+    c.setFont('Helvetica', 10)
+    c.drawString(20*mm, (H-26*mm), 'Name: ')
+    c.drawString(20*mm, (H-32*mm), 'Reg No: ')
+    c.drawString(20*mm, (H-38*mm), 'Department: ')
+    c.drawString(20*mm, (H-44*mm), 'Date: ')
+    y = H - 60*mm
+    c.setFont('Helvetica-Bold', 10)
+    c.drawString(20*mm, y, 'Paper Code')
+    c.drawString(60*mm, y, 'Title')
+    c.drawString(150*mm, y, 'Hall/Seat')
+
+
+def _hall_ticket_v2(c) -> None:
+    c.setFont('Helvetica-Bold', 14)
+    c.drawString(20*mm, H-20*mm, 'HALL TICKET')
+    c.setFont('Helvetica', 11)
+    y = H-30*mm
+    for label in V2_TICKET_LABELS:
+        c.drawString(20*mm, y, label)
+        y -= 7*mm
+
+
+def _attendance_header(c) -> None:
+    y = H - 30*mm
+    c.setFont('Helvetica-Bold', 10)
+    c.drawString(20*mm, y, 'Seat')
+    c.drawString(35*mm, y, 'Reg No')
+    c.drawString(70*mm, y, 'Name')
+    c.drawString(150*mm, y, 'Sign')
+
+
+FORMS: Dict[str, Callable] = {
+    'HallTicket': _hall_ticket,
+    'HallTicketV2': _hall_ticket_v2,
+    'AttendanceHeader': _attendance_header,
+}
+
+
+def place_form(c, name: str, shared: bool = True) -> None:
+    """Stamp the named static layout on the current page, defining it on first use.
+
+    ``shared=False`` draws the layout straight onto the page instead.
+    """
+    if not shared:
+        c.saveState()
+        FORMS[name](c)
+        c.restoreState()
+        return
+    if not c.hasForm(name):
+        c.beginForm(name)
+        FORMS[name](c)
+        c.endForm()
+    c.doForm(name)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+import os
+from functools import lru_cache
+from typing import Tuple
+
+import qrcode
+
+# Encoded matrices kept per process; repeat downloads of the same ticket skip encoding
+QR_CACHE_SIZE = int(os.getenv('QR_CACHE_SIZE', '4096'))
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_matrix(payload: str) -> Tuple[Tuple[bool, ...], ...]:
+    """Encode ``payload`` and return the module matrix (quiet zone included)."""
+    qr = qrcode.QRCode(border=4)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return tuple(tuple(row) for row in qr.get_matrix())
+
+
+def draw_qr(c, payload: str, x: float, y: float, size: float) -> None:
+    """Draw the QR code for ``payload`` as vector rectangles in a ``size`` square
+    whose lower-left corner is (x, y).
+
+    Horizontal runs of dark modules are merged into one rectangle and the whole
+    symbol is filled as a single path, so no PIL image or PNG decode is involved.
+    """
+    matrix = qr_matrix(payload)
+    n = len(matrix)
+    m = size / n
+    top = y + size
+    p = c.beginPath()
+    for r, row in enumerate(matrix):
+        row_y = top - (r + 1) * m
+        col = 0
+        while col < n:
+            if row[col]:
+                start = col
+                while col < n and row[col]:
+                    col += 1
+                p.rect(x + start * m, row_y, (col - start) * m, m)
+            else:
+                col += 1
+    c.saveState()
+    c.setFillColorRGB(0, 0, 0)
+    c.drawPath(p, stroke=0, fill=1)
+    c.restoreState()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+import json
+import math
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# The 16-column timetable view shown on the Students page. Uploads write the rows
+# to ``last_students.json`` and, next to it, a small summary file (columns, row
+# count, per-subject totals) so the page never has to read the rows to render.
+
+SHEET_COLUMNS = [
+    'SNO', 'ENQ', 'Reg_No', 'Name of the Student', 'Prog & Year', 'CLASS CODE', 'year', 'Degree', 'Dept',
+    'DEPT ORD', 'CLASS ORD', 'SUB ORD', 'SUB_CODE', 'SUB_TITLE', 'DATE', 'SESS'
+]
+SHEET_FILENAME = 'last_students.json'
+SUBJECT_KEY = ['SUB_CODE', 'SUB_TITLE', 'DATE', 'SESS']
+
+_lock = threading.Lock()
+_rows_cache: Dict[str, Any] = {}
+
+
+def sheet_path(folder: str) -> str:
+    return os.path.join(folder, SHEET_FILENAME)
+
+
+def summary_path(json_path: str) -> str:
+    root, _ = os.path.splitext(json_path)
+    return root + '.summary.json'
+
+
+def subject_summary(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Row counts per (SUB_CODE, SUB_TITLE, DATE, SESS), ordered by date, session, code, title."""
+    if df.empty or not set(SUBJECT_KEY) <= set(df.columns):
+        return []
+    counts = df.groupby(SUBJECT_KEY, sort=False).size().reset_index(name='TOTAL')
+    counts = counts.sort_values(['DATE', 'SESS', 'SUB_CODE', 'SUB_TITLE'], kind='stable')
+    return [
+        {'SUB_CODE': r[0], 'SUB_TITLE': r[1], 'DATE': r[2], 'SESS': r[3], 'TOTAL': int(r[4])}
+        for r in counts.itertuples(index=False)
+    ]
+
+
+def _write_json(path: str, write) -> None:
+    # Temp file + rename: a concurrent page load sees the old file or the new one, never half
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _dump_summary(json_path: str, summary: Dict[str, Any]) -> None:
+    def write(tmp):
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(summary, fh, ensure_ascii=False)
+    _write_json(summary_path(json_path), write)
+
+
+def write_sheet(display_df: pd.DataFrame, folder: str, subjects: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Persist the 16-column view and its precomputed summary; returns the rows path.
+
+    Pass ``subjects`` when the caller already built ``subject_summary(display_df)``.
+    """
+    os.makedirs(folder, exist_ok=True)
+    json_path = sheet_path(folder)
+    _write_json(json_path, lambda tmp: display_df.to_json(tmp, orient='records', force_ascii=False))
+    _dump_summary(json_path, {
+        'columns': [c for c in SHEET_COLUMNS if c in display_df.columns] or SHEET_COLUMNS,
+        'total': int(len(display_df)),
+        'subjects': subjects if subjects is not None else subject_summary(display_df),
+    })
+    return json_path
+
+
+def load_summary(json_path: Optional[str]) -> Optional[Dict[str, Any]]:
+    """The stored summary of ``json_path``; built once from the rows for older uploads."""
+    if not json_path or not os.path.exists(json_path):
+        return None
+    try:
+        with open(summary_path(json_path), 'r', encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        pass
+    rows = load_rows(json_path)
+    df = pd.DataFrame(rows)
+    summary = {
+        'columns': [c for c in SHEET_COLUMNS if rows and c in rows[0]] or SHEET_COLUMNS,
+        'total': len(rows),
+        'subjects': subject_summary(df),
+    }
+    try:
+        _dump_summary(json_path, summary)
+    except OSError:
+        pass
+    return summary
+
+
+def load_rows(json_path: str) -> List[Dict[str, Any]]:
+    """Rows of ``json_path``, parsed once per file version (mtime and size)."""
+    return _entry(json_path)['rows']
+
+
+def _entry(json_path: str) -> Dict[str, Any]:
+    st = os.stat(json_path)
+    version = (os.path.abspath(json_path), st.st_mtime_ns, st.st_size)
+    entry = _rows_cache.get('entry')
+    if entry is not None and entry['version'] == version:
+        return entry
+    with _lock:
+        entry = _rows_cache.get('entry')
+        if entry is None or entry['version'] != version:
+            with open(json_path, 'r', encoding='utf-8') as fh:
+                rows = json.load(fh)
+            # One cached sheet: a new upload replaces the previous entry
+            entry = {'version': version, 'rows': rows, 'haystack': None, 'orders': {}}
+            _rows_cache['entry'] = entry
+        return entry
+
+
+def _haystack(entry: Dict[str, Any]) -> List[str]:
+    if entry['haystack'] is None:
+        entry['haystack'] = ['\x1f'.join(str(v) for v in r.values()).lower() for r in entry['rows']]
+    return entry['haystack']
+
+
+def _order(entry: Dict[str, Any], column: str) -> List[int]:
+    # Ascending row order per column, computed once per file version
+    order = entry['orders'].get(column)
+    if order is None:
+        rows = entry['rows']
+        order = sorted(range(len(rows)), key=lambda i: _sort_key(rows[i].get(column)))
+        entry['orders'][column] = order
+    return order
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    # Numeric-looking cells (SNO, ORD columns) sort as numbers, the rest as text
+    text = '' if value is None else str(value).strip()
+    try:
+        number = float(text)
+        if math.isfinite(number):
+            return (0, number, '')
+    except ValueError:
+        pass
+    return (1, 0.0, text.lower())
+
+
+def query_rows(
+    json_path: str,
+    q: str = '',
+    sort: Optional[str] = None,
+    descending: bool = False,
+    offset: int = 0,
+    limit: int = 25,
+) -> Dict[str, Any]:
+    """One page of rows, filtered by a case-insensitive substring and sorted by a column."""
+    entry = _entry(json_path)
+    rows = entry['rows']
+    if sort and rows and sort in rows[0]:
+        idx = _order(entry, sort)
+        if descending:
+            idx = idx[::-1]
+    else:
+        idx = range(len(rows))
+    needle = (q or '').strip().lower()
+    if needle:
+        hay = _haystack(entry)
+        idx = [i for i in idx if needle in hay[i]]
+    page = [rows[i] for i in idx[offset:offset + limit]]
+    return {'total': len(rows), 'filtered': len(idx), 'offset': offset, 'limit': limit, 'rows': page}
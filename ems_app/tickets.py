@@ -0,0 +1,252 @@
+from __future__ import annotations
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Callable, List, Dict, Any, Tuple, Iterable, Iterator, Optional
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+from werkzeug.utils import secure_filename
+
+from .qr import draw_qr
+from .pdf_templates import place_form, TICKET_VALUE_X
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def ticket_filename(rec: Dict[str, Any]) -> str:
+    return f"{rec['reg']}_{rec['date']}_{rec['session']}.pdf"
+
+
+def render_ticket_pdf(rec: Dict[str, Any]) -> bytes:
+    """Render a one-page hall ticket for a single (student, subject, seat) record.
+
+    ``rec`` is a plain dict so it can be pickled to worker processes:
+    reg, name, department, year, date (ISO), session, sub_code, sub_title, hall_name, seat_no.
+    """
+    buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
+    draw_ticket_page(c, rec, shared_frame=False)
+    c.showPage(); c.save(); pdf = buf.getvalue(); buf.close()
+    return pdf
+
+
+def render_student_ticket_pdf(rec: Dict[str, Any]) -> bytes:
+    """Render one student's ticket listing every paper of a date/session.
+
+    ``rec``: reg, name, department, year, date (ISO), session and ``rows`` of
+    (sub_code, sub_title, hall_name, seat_no).
+    """
+    buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
+    _draw_ticket_header(c, rec, f"{rec['reg']}|{rec['date']}|{rec['session']}", shared_frame=False)
+    _draw_ticket_rows(c, rec['rows'])
+    c.showPage(); c.save(); pdf = buf.getvalue(); buf.close()
+    return pdf
+
+
+def render_tickets_merged(records: Iterable[Dict[str, Any]], fileobj) -> None:
+    """Write every ticket as one page of a single PDF into ``fileobj``."""
+    c = canvas.Canvas(fileobj, pagesize=A4)
+    for rec in records:
+        draw_ticket_page(c, rec)
+        c.showPage()
+    c.save()
+
+
+def draw_ticket_page(c, rec: Dict[str, Any], shared_frame: bool = True) -> None:
+    """Draw one ticket on the current page: the frame plus this record's values.
+
+    ``shared_frame`` stamps the frame as a form, for documents of many tickets.
+    """
+    _draw_ticket_header(c, rec, f"{rec['reg']}|{rec['date']}|{rec['session']}|{rec['sub_code']}", shared_frame)
+    _draw_ticket_rows(c, [(rec['sub_code'], rec['sub_title'], rec['hall_name'], rec['seat_no'])])
+
+
+def _draw_ticket_header(c, rec: Dict[str, Any], qr_payload: str, shared_frame: bool) -> None:
+    # Frame, student fields and QR: the part every ticket layout shares
+    W, H = A4
+    place_form(c, 'HallTicket', shared=shared_frame)
+    c.setFont('Helvetica', 10)
+    c.drawString(TICKET_VALUE_X['name'], (H-26*mm), f"{rec['name']}")
+    c.drawString(TICKET_VALUE_X['reg'], (H-32*mm), f"{rec['reg']}")
+    c.drawString(TICKET_VALUE_X['department'], (H-38*mm), f"{rec['department']}  Year: {rec['year']}")
+    c.drawString(TICKET_VALUE_X['date'], (H-44*mm), f"{rec['date']}  Session: {rec['session']}")
+    draw_qr(c, qr_payload, (W-40*mm), (H-50*mm), 20*mm)
+
+
+def _draw_ticket_rows(c, rows: Iterable[Tuple[str, str, str, Any]]) -> None:
+    # (sub_code, sub_title, hall_name, seat_no) rows below the header, continuing onto new pages
+    _, H = A4
+    y = H - 66*mm
+    for sub_code, sub_title, hall_name, seat_no in rows:
+        if y < 20*mm:
+            c.showPage(); y = H - 20*mm
+            c.setFont('Helvetica', 10)
+        title = sub_title or ''
+        c.drawString(20*mm, y, sub_code)
+        c.drawString(60*mm, y, (title[:50] + ('...' if len(title) > 50 else '')))
+        c.drawString(150*mm, y, f"{hall_name} / {seat_no}")
+        y -= 6*mm
+
+
+def draw_attendance_sheet(c, title: str, rows: Iterable[Tuple[Any, str, str]]) -> None:
+    """Draw an attendance sheet of (seat_no, reg_no, name) rows, starting on the current page.
+
+    Column headers come from the shared 'AttendanceHeader' form and are repeated on
+    every continuation page. The caller ends the last page.
+    """
+    W, H = A4
+    c.setFont('Helvetica-Bold', 12)
+    c.drawString(20*mm, (H-20*mm), title)
+    place_form(c, 'AttendanceHeader')
+    y = H - 36*mm
+    c.setFont('Helvetica', 10)
+    for seat_no, reg, name in rows:
+        # Break only when another row follows, so a full last page gets no empty successor
+        if y < 20*mm:
+            c.showPage()
+            place_form(c, 'AttendanceHeader')
+            y = H - 36*mm
+            c.setFont('Helvetica', 10)
+        name = name or ''
+        c.drawString(20*mm, y, str(seat_no))
+        c.drawString(35*mm, y, reg or '')
+        c.drawString(70*mm, y, (name[:40] + ('...' if len(name) > 40 else '')))
+        c.line(150*mm, y-1*mm, (W-20*mm), y-1*mm)
+        y -= 7*mm
+
+
+def attendance_filename(sheet: Dict[str, Any]) -> str:
+    hall = secure_filename(str(sheet['hall_name'] or '')) or f"hall{sheet['hall_id']}"
+    return f"attendance_{hall}_{sheet['date']}_{sheet['session']}.pdf"
+
+
+def attendance_title(sheet: Dict[str, Any]) -> str:
+    return f"Attendance Sheet - {sheet['hall_name']}  {sheet['date']} {sheet['session']}"
+
+
+def render_attendance_pdf(sheet: Dict[str, Any]) -> bytes:
+    """Render one hall's attendance sheet.
+
+    ``sheet``: hall_id, hall_name, date (ISO), session and ``rows`` of (seat_no, reg_no, name).
+    """
+    buf = BytesIO(); c = canvas.Canvas(buf, pagesize=A4)
+    draw_attendance_sheet(c, attendance_title(sheet), sheet['rows'])
+    c.showPage(); c.save(); pdf = buf.getvalue(); buf.close()
+    return pdf
+
+
+def render_attendance_merged(sheets: Iterable[Dict[str, Any]], fileobj) -> None:
+    """Write every hall's sheet into one PDF, each hall starting on a new page."""
+    c = canvas.Canvas(fileobj, pagesize=A4)
+    for sheet in sheets:
+        draw_attendance_sheet(c, attendance_title(sheet), sheet['rows'])
+        c.showPage()
+    c.save()
+
+
+def _ticket_entry(rec: Dict[str, Any]) -> Tuple[str, bytes]:
+    return ticket_filename(rec), render_ticket_pdf(rec)
+
+
+def _attendance_entry(sheet: Dict[str, Any]) -> Tuple[str, bytes]:
+    return attendance_filename(sheet), render_attendance_pdf(sheet)
+
+
+def _render_batch(render: Callable, records: List[Dict[str, Any]]) -> List[Tuple[str, bytes]]:
+    return [render(r) for r in records]
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    # One long-lived pool per process; recreated only when the worker count changes
+    # Request threads share it: the lock keeps two of them from each starting a pool
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the render pool's worker processes; registered with atexit."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool, _pool_workers = None, 0
+
+
+atexit.register(shutdown_pool)
+
+
+def pool_supported() -> bool:
+    # Only 'fork' workers inherit the loaded modules. Under 'spawn' (Windows, macOS) and
+    # 'forkserver' (the Linux default from Python 3.14) each worker re-imports the parent's
+    # __main__, i.e. app.py with its database and Mongo setup and migrations; render
+    # in-process there instead
+    return multiprocessing.get_start_method() == 'fork'
+
+
+def resolve_workers(value: Any) -> int:
+    """Worker count from config: a positive int, or 0/empty for one per CPU."""
+    try:
+        n = int(value or 0)
+    except (TypeError, ValueError):
+        n = 0
+    return n if n > 0 else (os.cpu_count() or 1)
+
+
+def _render_entries(
+    render: Callable,
+    records: Iterable[Dict[str, Any]],
+    workers: int,
+    batch_size: int,
+) -> Iterator[Tuple[str, bytes]]:
+    # ``render`` must be a module-level function so it can be pickled to the pool
+    records = list(records)
+    if workers <= 1 or len(records) <= batch_size or not pool_supported():
+        for r in records:
+            yield render(r)
+        return
+
+    pool = _get_pool(workers)
+    batches = (records[i:i + batch_size] for i in range(0, len(records), batch_size))
+    in_flight: deque = deque()
+    for batch in batches:
+        in_flight.append(pool.submit(_render_batch, render, batch))
+        if len(in_flight) >= 2 * workers:
+            yield from in_flight.popleft().result()
+    while in_flight:
+        yield from in_flight.popleft().result()
+
+
+def render_tickets(
+    records: Iterable[Dict[str, Any]],
+    workers: int = 1,
+    batch_size: int = 32,
+) -> Iterator[Tuple[str, bytes]]:
+    """Yield (filename, pdf_bytes) for every record, in input order.
+
+    With ``workers > 1`` records are sharded into batches rendered by a process pool
+    (in-process where the start method is 'spawn', see ``pool_supported``). At most ``2 * workers`` batches are in flight, so a slow consumer never lets
+    finished PDFs pile up in memory.
+    """
+    return _render_entries(_ticket_entry, records, workers, batch_size)
+
+
+def render_attendance_sheets(
+    sheets: Iterable[Dict[str, Any]],
+    workers: int = 1,
+    batch_size: int = 2,
+) -> Iterator[Tuple[str, bytes]]:
+    """Yield (filename, pdf_bytes) per hall sheet, in input order, like ``render_tickets``."""
+    return _render_entries(_attendance_entry, sheets, workers, batch_size)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import heapq
+from collections import defaultdict
+from typing import List, Dict, Any, Tuple, Iterable, Optional, Set
+
+
+def build_conflict_graph(registrations: Iterable[Tuple[int, int]]) -> Tuple[Dict[int, int], Dict[int, Set[int]]]:
+    """Build the subject conflict graph from (student_id, subject_id) registrations.
+
+    Returns (enrolment, adjacency): enrolment counts students per subject and two
+    subjects are adjacent when at least one student is registered for both. Subjects
+    are grouped per student first, so the work is proportional to the sum of k^2 over
+    students (k = subjects per student) rather than subjects^2.
+    """
+    per_student: Dict[int, Set[int]] = defaultdict(set)
+    for student_id, subject_id in registrations:
+        per_student[student_id].add(subject_id)
+
+    enrolment: Dict[int, int] = defaultdict(int)
+    adjacency: Dict[int, Set[int]] = defaultdict(set)
+    for subjects in per_student.values():
+        for subj in subjects:
+            enrolment[subj] += 1
+            if len(subjects) > 1:
+                adjacency[subj].update(subjects)
+    for subj, neighbours in adjacency.items():
+        neighbours.discard(subj)
+    for subj in enrolment:
+        adjacency.setdefault(subj, set())
+    return dict(enrolment), dict(adjacency)
+
+
+def dsatur_schedule(
+    enrolment: Dict[int, int],
+    adjacency: Dict[int, Set[int]],
+    slot_count: int,
+    slot_capacity: Optional[int] = None,
+    precoloured: Optional[Dict[int, int]] = None,
+) -> Dict[str, Any]:
+    """Colour subjects into ``slot_count`` slots with the DSatur heuristic.
+
+    The next subject is always the one whose neighbours already occupy the most
+    distinct slots (ties: more neighbours, then more students). It goes to the least
+    loaded slot that none of its neighbours use and that still has room for its
+    students under ``slot_capacity``. Subjects that fit nowhere are left unscheduled.
+    Neighbours missing from ``enrolment`` (scheduled elsewhere) are ignored.
+    """
+    colour: Dict[int, int] = {}
+    load = [0] * slot_count
+    neighbour_slots: Dict[int, Set[int]] = defaultdict(set)
+
+    def place(subj: int, c: int) -> None:
+        colour[subj] = c
+        load[c] += enrolment.get(subj, 0)
+        for nb in adjacency.get(subj, ()):
+            if nb not in colour:
+                neighbour_slots[nb].add(c)
+
+    for subj, c in (precoloured or {}).items():
+        if 0 <= c < slot_count:
+            place(subj, c)
+
+    heap = [(0, -len(adjacency.get(s, ())), -enrolment[s], s) for s in enrolment if s not in colour]
+    for subj in list(colour):
+        for nb in adjacency.get(subj, ()):
+            if nb not in colour and nb in enrolment:
+                heapq.heappush(heap, (-len(neighbour_slots[nb]), -len(adjacency[nb]), -enrolment[nb], nb))
+    heapq.heapify(heap)
+
+    unscheduled: List[int] = []
+    done: Set[int] = set()
+    while heap:
+        neg_sat, _, _, subj = heapq.heappop(heap)
+        if subj in colour or subj in done or -neg_sat != len(neighbour_slots[subj]):
+            continue  # stale entry
+        done.add(subj)
+        blocked = neighbour_slots[subj]
+        need = enrolment[subj]
+        best = -1
+        for c in range(slot_count):
+            if c in blocked:
+                continue
+            if slot_capacity is not None and load[c] + need > slot_capacity:
+                continue
+            if best < 0 or load[c] < load[best]:
+                best = c
+        if best < 0:
+            unscheduled.append(subj)
+            continue
+        place(subj, best)
+        for nb in adjacency[subj]:
+            if nb not in colour and nb not in done and nb in enrolment:
+                heapq.heappush(heap, (-len(neighbour_slots[nb]), -len(adjacency[nb]), -enrolment[nb], nb))
+
+    return {
+        'assignment': colour,
+        'unscheduled': unscheduled,
+        'slot_load': load,
+    }
@@ -0,0 +1,77 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event
+
+# One set of session listeners for everything that reacts to "rows of these
+# models changed in this transaction": the data-version counters, the artifact
+# store and the dashboard cache. Each flush walks new/dirty/deleted once and
+# hands every object to the subscribers watching its model; subscribers see the
+# markers they collected just before and/or just after the commit, and a
+# rollback forgets them. Bulk ``Query.delete()``/``bulk_insert_mappings`` and
+# Mongo writes bypass these events and must notify explicitly.
+
+_PENDING = 'touched_pending'
+_COMMITTING = 'touched_committing'
+
+
+class TouchedModels:
+    """Dispatches the ORM rows a transaction touched to per-model subscribers."""
+
+    def __init__(self, session):
+        # (models, collect, before_commit, after_commit)
+        self._subscribers: List[tuple] = []
+        event.listen(session, 'after_flush', self._after_flush)
+        event.listen(session, 'before_commit', self._before_commit)
+        event.listen(session, 'after_commit', self._after_commit)
+        event.listen(session, 'after_rollback', self._after_rollback)
+
+    def subscribe(
+        self,
+        models: Iterable[type],
+        collect: Optional[Callable[[Any, Any], Iterable[Any]]] = None,
+        before_commit: Optional[Callable[[Any, Set[Any]], None]] = None,
+        after_commit: Optional[Callable[[Set[Any]], None]] = None,
+    ) -> None:
+        """Watch ``models``.
+
+        ``collect(session, obj)`` runs at flush time for each touched row and returns
+        markers; it must not query. The default marks the transaction as touched.
+        ``before_commit(session, markers)`` runs on the committing connection, so its
+        writes commit with the data; ``after_commit(markers)`` runs once it is durable.
+        """
+        self._subscribers.append((tuple(models), collect or (lambda sess, obj: (True,)), before_commit, after_commit))
+
+    def _after_flush(self, sess, flush_context) -> None:
+        pending: Dict[int, Set[Any]] = sess.info.setdefault(_PENDING, {})
+        # session.dirty builds a new set on every access: read it once
+        dirty = [obj for obj in sess.dirty if sess.is_modified(obj)]
+        for obj in list(sess.new) + dirty + list(sess.deleted):
+            for i, (models, collect, _, _) in enumerate(self._subscribers):
+                if isinstance(obj, models):
+                    pending.setdefault(i, set()).update(collect(sess, obj))
+
+    def _before_commit(self, sess) -> None:
+        # before_commit fires ahead of commit's own flush; flush here so its changes count
+        sess.flush()
+        pending = sess.info.pop(_PENDING, None)
+        if not pending:
+            return
+        for i, markers in pending.items():
+            hook = self._subscribers[i][2]
+            if markers and hook is not None:
+                hook(sess, markers)
+        sess.info[_COMMITTING] = pending
+
+    def _after_commit(self, sess) -> None:
+        pending = sess.info.pop(_COMMITTING, None)
+        if not pending:
+            return
+        for i, markers in pending.items():
+            hook = self._subscribers[i][3]
+            if markers and hook is not None:
+                hook(markers)
+
+    def _after_rollback(self, sess) -> None:
+        sess.info.pop(_PENDING, None)
+        sess.info.pop(_COMMITTING, None)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+import hashlib
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from flask import Response, request
+from sqlalchemy import insert, select, update
+
+# Data-version counters: one per (date, session) scope plus a global scope for
+# edits (student, hall, subject) that can change every printed export. Exports
+# derive a strong ETag from the counters they depend on, so a conditional GET is
+# answered with a single counter read.
+
+GLOBAL_SCOPE = '*'
+
+
+def scope_key(date: Any, sess: Any) -> str:
+    d = date.isoformat() if hasattr(date, 'isoformat') else str(date)
+    return f"{d}/{str(sess or '').strip().upper()}"
+
+
+def make_etag(versions: Dict[str, int], *parts: Any) -> str:
+    """Strong ETag over the scope counters plus whatever selects the representation."""
+    blob = '|'.join([f"{k}={versions.get(k, 0)}" for k in sorted(versions)] + [str(p) for p in parts])
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+
+def request_variant() -> str:
+    # Endpoint, view args and query string: format, hall or student pick different bodies
+    args = '&'.join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    view = ','.join(f"{k}={v}" for k, v in sorted((request.view_args or {}).items()))
+    return f"{request.endpoint}({view})?{args}"
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """A 304 response when the client already holds ``etag``, else None."""
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        return with_etag(resp, etag)
+    return None
+
+
+def with_etag(resp: Response, etag: str) -> Response:
+    resp.set_etag(etag)
+    # Behind a login: let the browser keep the body but always revalidate
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
+
+
+# --- SQL -----------------------------------------------------------------
+
+def _upsert(connection, table, scopes):
+    rows = [{'scope': s, 'version': 1} for s in scopes]
+    dialect = connection.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table).values(rows)
+        return stmt.on_duplicate_key_update(version=table.c.version + 1)
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).values(rows)
+        return stmt.on_conflict_do_update(index_elements=[table.c.scope], set_={'version': table.c.version + 1})
+    return None
+
+
+def bump_sql(connection, table, scopes: Iterable[str]) -> None:
+    """Increment the counters of ``scopes`` in the caller's transaction."""
+    scopes = sorted(set(scopes))  # fixed order so concurrent writers lock rows alike
+    if not scopes:
+        return
+    stmt = _upsert(connection, table, scopes)
+    if stmt is not None:
+        connection.execute(stmt)
+        return
+    for scope in scopes:
+        res = connection.execute(update(table).where(table.c.scope == scope).values(version=table.c.version + 1))
+        if res.rowcount == 0:
+            connection.execute(insert(table).values(scope=scope, version=1))
+
+
+def read_sql_versions(connection, table, scopes: Iterable[str]) -> Dict[str, int]:
+    scopes = list(scopes)
+    found = dict(connection.execute(select(table.c.scope, table.c.version).where(table.c.scope.in_(scopes))).all())
+    return {s: int(found.get(s, 0)) for s in scopes}
+
+
+def bump_on_commit(touched, table, models: Iterable[type], collect: Callable[[Any, Any], Iterable[Any]],
+                   resolve: Optional[Callable[[Any, Set[Any]], Set[str]]] = None) -> None:
+    """Bump the scopes a transaction touched, once, just before it commits.
+
+    ``touched`` is the session's ``TouchedModels``. ``collect(session, obj)`` maps each
+    touched row of ``models`` to scopes, or to markers that ``resolve(connection,
+    markers)`` turns into scopes at commit time. One upsert per transaction keeps
+    per-row flushes cheap and locks the scope rows only for the end of the transaction.
+    """
+    def _bump(sess, markers):
+        connection = sess.connection()
+        scopes = resolve(connection, markers) if resolve else markers
+        if scopes:
+            bump_sql(connection, table, scopes)
+
+    touched.subscribe(models, collect, before_commit=_bump)
+
+
+# --- Mongo ---------------------------------------------------------------
+
+def bump_mongo(db, scopes: Iterable[str]) -> None:
+    coll = db.get_collection('data_versions')
+    for scope in sorted(set(scopes)):
+        coll.update_one({'_id': scope}, {'$inc': {'v': 1}}, upsert=True)
+
+
+def read_mongo_versions(db, scopes: Iterable[str]) -> Dict[str, int]:
+    scopes = list(scopes)
+    found = {d['_id']: d.get('v', 0) for d in db.get_collection('data_versions').find({'_id': {'$in': scopes}})}
+    return {s: int(found.get(s, 0)) for s in scopes}
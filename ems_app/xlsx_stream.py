@@ -0,0 +1,34 @@
+from __future__ import annotations
+from typing import List, Any, Tuple, Iterable, Set
+
+from openpyxl import Workbook
+
+
+def _sheet_title(title: str, used: Set[str]) -> str:
+    # Excel limits sheet names to 31 characters and requires them to be unique
+    base = (title or 'Sheet')[:31]
+    name, n = base, 1
+    while name.lower() in used:
+        n += 1
+        suffix = f" ({n})"
+        name = base[:31 - len(suffix)] + suffix
+    used.add(name.lower())
+    return name
+
+
+def write_xlsx(fileobj, sheets: Iterable[Tuple[str, List[str], Iterable[List[Any]]]]) -> None:
+    """Write (title, header, rows) sheets with openpyxl's write-only mode.
+
+    Rows are consumed one at a time and spilled to disk by openpyxl, so memory does
+    not grow with the row count; ``fileobj`` receives the finished workbook.
+    """
+    wb = Workbook(write_only=True)
+    used: Set[str] = set()
+    for title, header, rows in sheets:
+        ws = wb.create_sheet(title=_sheet_title(title, used))
+        ws.append(header)
+        for row in rows:
+            ws.append(row)
+    if not used:
+        wb.create_sheet(title='Sheet')
+    wb.save(fileobj)
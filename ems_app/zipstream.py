@@ -0,0 +1,50 @@
+from __future__ import annotations
+import zipfile
+from typing import List, Tuple, Iterable, Iterator
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that buffers bytes until drained.
+
+    zipfile detects the missing ``seek`` and switches to data descriptors, so each
+    entry can be emitted as soon as it is written.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries: Iterable[Tuple[str, bytes]], compression: int = zipfile.ZIP_DEFLATED) -> Iterator[bytes]:
+    """Yield a ZIP archive chunk by chunk from (name, data) entries.
+
+    Only the entry currently being written is buffered; the central directory is
+    emitted after the last entry.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression) as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
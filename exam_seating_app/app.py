@@ -1,8 +1,10 @@
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from flask import Flask, render_template, request, redirect, url_for, send_from_directory, flash
+from flask import Flask, render_template, request, redirect, url_for, send_from_directory, flash, jsonify
 from werkzeug.utils import secure_filename
 import pandas as pd
 
@@ -23,6 +25,12 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['OUTPUT_FOLDER'] = OUTPUT_FOLDER
 app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key")
 
+# Workbooks are written off the request path; the result page polls for them
+EXPORT_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.environ.get("EXPORT_WORKERS", "2")))
+# Finished exports nobody polled for are forgotten after this many seconds
+EXPORT_TTL = int(os.environ.get("EXPORT_TTL_SECONDS", "3600"))
+_exports = {}  # filename -> (future, time.monotonic() at submit)
+
 
 # ---------------------------------------------------------
 # Helpers
@@ -151,32 +159,80 @@ def allocate_seats(df: pd.DataFrame, hall_capacity: int = 30) -> pd.DataFrame:
     return alloc_df
 
 
-def generate_excel(alloc_df: pd.DataFrame) -> str:
-    """Save allocation and summary to an Excel file under outputs/ and return filename."""
+def build_summary(alloc_df: pd.DataFrame) -> pd.DataFrame:
+    """Total students and halls used per subject; shared by the preview and the workbook."""
+    return (
+        alloc_df.groupby(['SUB_CODE', 'SUB_TITLE'], dropna=False)
+                .agg(TOTAL_STUDENTS=('REG_NO', 'count'), HALLS_USED=('_HALL_KEY', pd.Series.nunique))
+                .reset_index()
+                .sort_values(['SUB_CODE', 'SUB_TITLE'])
+    )
+
+
+def new_output_filename() -> str:
     ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"seating_allocation_{ts}.xlsx"
+    return f"seating_allocation_{ts}_{uuid.uuid4().hex[:8]}.xlsx"
+
+
+def generate_excel(alloc_df: pd.DataFrame, summary: pd.DataFrame = None, filename: str = None) -> str:
+    """Save allocation and summary to an Excel file under outputs/ and return filename.
+
+    The workbook is written to a temporary name and renamed when complete, so a
+    download never sees a half-written file.
+    """
+    filename = filename or new_output_filename()
     out_path = os.path.join(OUTPUT_FOLDER, filename)
+    tmp_path = os.path.join(OUTPUT_FOLDER, '.' + filename)
+    if summary is None:
+        summary = build_summary(alloc_df)
 
-    # Build summary: total students and halls used per subject
-    summary = (
-        alloc_df.assign(_SUBJECT=alloc_df['SUB_CODE'].astype(str).str.strip() +
-                         (" - " + alloc_df['SUB_TITLE'].astype(str).str.strip()).where(alloc_df['SUB_TITLE'].astype(str).str.strip() != '', ""))
-                 .groupby(['SUB_CODE', 'SUB_TITLE'], dropna=False)
-                 .agg(TOTAL_STUDENTS=('REG_NO', 'count'),
-                      HALLS_USED=('_HALL_KEY', pd.Series.nunique))
-                 .reset_index()
-                 .sort_values(['SUB_CODE', 'SUB_TITLE'])
-    )
+    try:
+        with pd.ExcelWriter(tmp_path, engine='openpyxl') as writer:
+            alloc_cols = ['HALL_NO', 'SEAT_NO', 'REG_NO', 'NAME', 'SUB_CODE', 'SUB_TITLE', 'CLASS', 'DEPT', 'DATE', 'SESS']
+            alloc_df[alloc_cols].to_excel(writer, index=False, sheet_name='Allocation')
+            summary_cols = ['SUB_CODE', 'SUB_TITLE', 'TOTAL_STUDENTS', 'HALLS_USED']
+            summary[summary_cols].to_excel(writer, index=False, sheet_name='Summary')
+        os.replace(tmp_path, out_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return filename
 
-    with pd.ExcelWriter(out_path, engine='openpyxl') as writer:
-        alloc_cols = ['HALL_NO', 'SEAT_NO', 'REG_NO', 'NAME', 'SUB_CODE', 'SUB_TITLE', 'CLASS', 'DEPT', 'DATE', 'SESS']
-        alloc_df[alloc_cols].to_excel(writer, index=False, sheet_name='Allocation')
-        summary_cols = ['SUB_CODE', 'SUB_TITLE', 'TOTAL_STUDENTS', 'HALLS_USED']
-        summary[summary_cols].to_excel(writer, index=False, sheet_name='Summary')
 
+def submit_excel(alloc_df: pd.DataFrame, summary: pd.DataFrame) -> str:
+    """Queue workbook generation and return the filename it will be saved under."""
+    filename = new_output_filename()
+    now = time.monotonic()
+    prune_exports(now)
+    _exports[filename] = (EXPORT_EXECUTOR.submit(generate_excel, alloc_df, summary, filename), now)
     return filename
 
 
+def prune_exports(now: float) -> None:
+    """Drop finished exports older than EXPORT_TTL; the workbook itself stays on disk."""
+    for name, (future, submitted) in list(_exports.items()):
+        if future.done() and now - submitted > EXPORT_TTL:
+            _exports.pop(name, None)
+
+
+def export_state(filename: str) -> dict:
+    future, _ = _exports.get(filename, (None, None))
+    if future is None:
+        # Finished in an earlier poll, or written before a restart
+        if os.path.exists(os.path.join(OUTPUT_FOLDER, filename)):
+            return {'status': 'ready'}
+        return {'status': 'missing'}
+    if not future.done():
+        return {'status': 'pending'}
+    _exports.pop(filename, None)
+    error = future.exception()
+    if error is not None:
+        return {'status': 'failed', 'error': str(error)}
+    return {'status': 'ready'}
+
+
 # ---------------------------------------------------------
 # Routes
 # ---------------------------------------------------------
@@ -234,20 +290,15 @@ def allocate():
     # Allocate
     alloc_df = allocate_seats(norm, hall_capacity=capacity)
 
-    # Save Excel
-    download_filename = generate_excel(alloc_df)
+    # Summary is computed once; the workbook is written in the background
+    summary_df = build_summary(alloc_df)
+    download_filename = submit_excel(alloc_df, summary_df)
 
     # Prepare preview and summary for UI
     preview_cols = ['HALL_NO', 'SEAT_NO', 'REG_NO', 'NAME', 'SUB_CODE', 'SUB_TITLE', 'CLASS', 'DEPT', 'DATE', 'SESS']
     preview_df = alloc_df[preview_cols].head(200)
     preview_records = preview_df.to_dict(orient='records')
 
-    summary_df = (
-        alloc_df.groupby(['SUB_CODE', 'SUB_TITLE'], dropna=False)
-                .agg(TOTAL_STUDENTS=('REG_NO', 'count'), HALLS_USED=('_HALL_KEY', pd.Series.nunique))
-                .reset_index()
-                .sort_values(['SUB_CODE', 'SUB_TITLE'])
-    )
     summary_records = summary_df.to_dict(orient='records')
 
     return render_template(
@@ -261,8 +312,17 @@ def allocate():
     )
 
 
+@app.route('/download/<filename>/status', methods=['GET'])
+def download_status(filename):
+    state = export_state(filename)
+    return jsonify(state), (404 if state['status'] == 'missing' else 200)
+
+
 @app.route('/download/<path:filename>', methods=['GET'])
 def download(filename):
+    future, _ = _exports.get(filename, (None, None))
+    if future is not None and future.done():
+        _exports.pop(filename, None)
     return send_from_directory(OUTPUT_FOLDER, filename, as_attachment=True)
 
 
@@ -61,10 +61,28 @@ function loadAttendance() {
   window.location.href = "/attendance";
 }
 
+// Every student matching params (fields, department, year), fetched as keyset
+// pages of /api/students so no single response holds the whole table
+function fetchAllStudents(params = {}) {
+  const students = [];
+  const page = (afterId) => {
+    const query = new URLSearchParams({ ...params, limit: 1000 });
+    if (afterId) query.set("after_id", afterId);
+    return fetch(`/api/students?${query}`)
+      .then((response) => response.json())
+      .then((data) => {
+        if (!data.students) throw new Error(data.error || "Failed to fetch students");
+        students.push(...data.students);
+        return data.next_after_id ? page(data.next_after_id) : students;
+      });
+  };
+  return page(null);
+}
+
 // API functions
 const api = {
   // Students
-  getStudents: () => fetch("/api/students").then((response) => response.json()),
+  getStudents: (params) => fetchAllStudents(params),
   createStudent: (student) =>
     fetch("/api/students", {
       method: "POST",
@@ -178,6 +196,7 @@ window.loadHalls = loadHalls;
 window.loadHallTickets = loadHallTickets;
 window.loadReports = loadReports;
 window.loadAttendance = loadAttendance;
+window.fetchAllStudents = fetchAllStudents;
 window.api = api;
 window.handleFormSubmit = handleFormSubmit;
 window.showModal = showModal;